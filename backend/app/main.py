@@ -1,12 +1,16 @@
 import asyncio
 import json
+from contextlib import asynccontextmanager
+import pandas as pd
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from indicators.buffettIndicator import merge_buffett_indicator
 from indicators.buffettIndicator import periodic_buffett_index
 from indicators.macroIndicators import get_data_from_cache_or_api
+from indicators.macroIndicators import list_enabled_indicators
+from indicators.macroIndicators import get_indicator
 from indicators.fundFlow import analyze_market_fund_indicator
 from indicators.fundFlow import get_today_area_head_stocks
 from indicators.stockFinance import get_stock_history, get_stock_roe_history, get_stock_cyq_data,analyze_stock_discreteness
@@ -25,10 +29,32 @@ from indicators.stockTrades import get_stock_minute_trades
 from indicators.stockStatistic import stock_statistic
 from indicators.stockStatistic import get_might_sideways_stocks
 from indicators.marketReport import fetch_all_data
+from config.LRUCache import cache
+from config.SingleFlight import single_flight
+from config.IndicatorStore import indicator_store
+from config.GlobalConfig import CACHE_SWEEP_INTERVAL
+from config.cached_akshare_request import function_stats
+from app.warmup import start_warmup
+from config.upstream import run_upstream
 import os
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 开启 pandas 写时复制（pandas 3 起默认开启）：cached_akshare_request 返回的是缓存中 DataFrame 的浅拷贝，
+    # 开启后调用者修改返回值时才会复制数据，不会改动缓存。该选项对整个进程（包括 akshare）生效，
+    # 所以只在应用启动时设置，并且要在预加载开始之前
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+    # 启动后台线程定期清理过期缓存，释放内存
+    cache.start_sweeper(CACHE_SWEEP_INTERVAL)
+    indicator_store.start_sweeper(CACHE_SWEEP_INTERVAL)
+    # 在后台预加载常用数据
+    start_warmup()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # 配置 CORS 中间件
 app.add_middleware(
@@ -37,15 +63,58 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # 允许所有的 HTTP 方法（如 GET, POST 等）
     allow_headers=["*"],  # 允许所有的 HTTP 请求头
+    expose_headers=["X-Report-Diagnostics"],  # 允许前端读取报告数据的诊断信息
 )
 
 
 # 使用通用方法获取不同指标的数据
 @app.get("/api/cache/{indicator}")
 def get_indicator_data(indicator: str):
+    # 未知的指标直接返回 404，不请求 AkTools
+    if get_indicator(indicator) is None:
+        return JSONResponse(status_code=404, content={"error": f"未知的指标: {indicator}"})
     return get_data_from_cache_or_api(indicator)
 
 
+# 批量获取多个指标的数据，每个指标处理完成后立即以一行 JSON（NDJSON）返回
+@app.get("/api/cache-batch")
+async def get_indicator_data_batch(indicators: str = "all"):
+    """
+    indicators 为逗号分隔的指标键，"all" 表示所有启用的指标（按 order 排序）。
+    每行返回 {"indicator": 键, "data": ECharts 数据} 或 {"indicator": 键, "error": 错误信息}，
+    先完成的指标先返回。
+    """
+    if indicators == "all":
+        keys = list_enabled_indicators()
+    else:
+        keys = [key.strip() for key in indicators.split(",") if key.strip()]
+
+    async def fetch(key):
+        try:
+            data = await run_upstream(get_data_from_cache_or_api, key, source="aktools")
+            return {"indicator": key, "data": data}
+        except Exception as e:
+            return {"indicator": key, "error": str(e)}
+
+    async def stream():
+        for next_done in asyncio.as_completed([fetch(key) for key in keys]):
+            line = await next_done
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# 缓存统计：命中、未命中、淘汰、占用内存以及每个函数的命中率
+@app.get("/api/_cache/stats")
+def get_cache_stats():
+    return {
+        "cache": cache.stats(),
+        "functions": function_stats(),
+        "singleFlight": single_flight.stats(),
+        "indicatorStore": indicator_store.stats(),
+    }
+
+
 # 获取巴菲特指标
 @app.get("/api/buffett-indicator")
 def get_buffett_indicator():
@@ -54,8 +123,12 @@ def get_buffett_indicator():
 
 # 获取巴菲特指标
 @app.get("/api/buffett-indicator-p")
-def get_buffett_indicator_p(periodic:int):
-    data = periodic_buffett_index(periodic)
+def get_buffett_indicator_p(periodic: int = 5, rule: str = None):
+    """periodic 为每个周期的交易日数；rule 为自然周期 W（周）、M（月）、Q（季度），设置后忽略 periodic"""
+    try:
+        data = periodic_buffett_index(periodic, rule)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     return data
 
 # 获取资金流
@@ -180,7 +253,7 @@ async def get_visualization_data(audio_file_name: str):
 
     try:
         # 提取节拍数据
-        beatTimes = extract_beat_times(audio_file_path)
+        beatTimes = await run_upstream(extract_beat_times, audio_file_path, source="audio")
         # 返回数据
         response_data = {
             "beatTimes": beatTimes
@@ -201,7 +274,7 @@ async def get_a_stock_info():
     """
     try:
         # 获取数据
-        stock_info = getAMarketStocks()
+        stock_info = await run_upstream(getAMarketStocks)
         # 转换为字典格式返回
         result = stock_info.to_dict(orient="records")
         return JSONResponse(content={"status": "success", "data": result})
@@ -216,7 +289,7 @@ async def get_stock_info(stock_code: str):
     """
     try:
         # 调用 akshare 接口获取数据
-        stock_info = getStockBasic(stock_code)
+        stock_info = await run_upstream(getStockBasic, stock_code)
         
         # 如果返回数据为空，返回 404 错误
         if stock_info.empty:
@@ -247,7 +320,7 @@ async def get_stock_m_trades(stock_code: str):
     """
     try:
         # 调用 akshare 接口获取数据
-        mt = get_stock_minute_trades(stock_code)
+        mt = await run_upstream(get_stock_minute_trades, stock_code)
         
         # 如果返回的数据中没有 'minuteTrade' 或其为空，返回 404 错误
         if not mt.get("minuteTrade") or len(mt["minuteTrade"]) == 0:
@@ -276,7 +349,7 @@ async def get_stock_sts():
     """
     try:
         # 调用 stock_statistic 函数
-        result = stock_statistic()
+        result = await run_upstream(stock_statistic)
         # 将 DataFrame 转换为字典以支持 JSON 序列化
         result["筛选结果"]["前60家"] = result["筛选结果"]["前60家"].to_dict(orient="records")
         result["筛选结果"]["中间60家"] = result["筛选结果"]["中间60家"].to_dict(orient="records")
@@ -292,10 +365,13 @@ async def get_stock_sts():
 async def get_all_data():
     """
     获取所有整合数据，并以 JSON 格式返回。
+    各数据源的耗时和错误不放入返回的数据中（前端会把数据原样用于生成报告），
+    以 JSON 字符串的形式放在响应头 X-Report-Diagnostics 中。
     """
     try:
-        all_data = fetch_all_data()  # 调用数据获取函数
-        return JSONResponse(content=all_data)  # 返回 JSON 格式的响应
+        all_data, diagnostics = await run_upstream(fetch_all_data)  # 在上游线程池中调用数据获取函数
+        # 返回 JSON 格式的响应
+        return JSONResponse(content=all_data, headers={"X-Report-Diagnostics": json.dumps(diagnostics)})
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
     
\ No newline at end of file
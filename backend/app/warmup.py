@@ -0,0 +1,81 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config.GlobalConfig import WARMUP_ENABLED, WARMUP_WORKERS, WARMUP_DELAY
+from indicators import buffettIndicator, fundFlow, estFundFlow, marketReport
+
+SECTOR_TYPES = ["行业资金流", "概念资金流"]
+
+
+def warmup_tasks():
+    """
+    需要预加载的数据，对应 /api/buffett-indicator、/api/market-fund-flow、
+    /api/sector-fund-flow* 和 /api/report-data 背后的缓存函数。
+
+    返回:
+        list: (名称, 函数, 参数) 列表
+    """
+    tasks = [
+        ("巴菲特指标", buffettIndicator.get_buffett_data, ()),
+        ("CPI 数据", buffettIndicator.get_cpi_data, ()),
+        ("LPR 数据", buffettIndicator.get_lpr_data, ()),
+        ("宏观杠杆率", buffettIndicator.get_macro_leverage_data, ()),
+        ("市盈率数据", buffettIndicator.get_pe_data, ()),
+        ("上证指数历史行情", buffettIndicator.get_stock_zh_index_data, ()),
+        ("大盘资金流", fundFlow.get_market_fund_flow, ()),
+    ]
+    # 合并后的板块资金流表（/api/sector-fund-flow* 使用），同时加载其中各周期的数据
+    for sector_type in SECTOR_TYPES:
+        tasks.append((f"{sector_type}（{'、'.join(estFundFlow.SECTOR_INDICATORS)}）",
+                      estFundFlow.load_sector_fund_flow_tables, (sector_type,)))
+    tasks += [
+        ("报告 CPI", marketReport.get_cpi_data, ()),
+        ("报告 LPR", marketReport.get_lpr_data, ()),
+        ("报告宏观杠杆率", marketReport.get_macro_leverage_data, ()),
+        ("报告上证行情", marketReport.get_stock_zh_real_time, ()),
+        ("报告巴菲特指标", marketReport.get_class_buffet_indice, ()),
+        ("报告市场资金流", marketReport.get_market_fund_flow, ()),
+        ("报告涨跌统计", marketReport.fetch_stock_data, ()),
+        ("报告板块资金流", marketReport.get_section_fund_flow, ()),
+    ]
+    return tasks
+
+
+def warm_up_cache(workers=WARMUP_WORKERS):
+    """并发预加载数据，并按 main.js 识别的格式（包含“加载”）在标准输出打印进度"""
+    tasks = warmup_tasks()
+    total = len(tasks)
+    started = time.time()
+    print(f"正在加载市场数据，共 {total} 项", flush=True)
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warmup") as executor:
+        futures = {executor.submit(func, *args): name for name, func, args in tasks}
+        for future in as_completed(futures):
+            name = futures[future]
+            done += 1
+            try:
+                future.result()
+                print(f"加载 {name} 完成 ({done}/{total})", flush=True)
+            except Exception as e:
+                print(f"加载 {name} 失败 ({done}/{total}): {e}", flush=True)
+
+    print(f"数据预加载完成，耗时 {time.time() - started:.1f} 秒", flush=True)
+
+
+def start_warmup():
+    """在后台线程中启动预加载，不阻塞服务启动"""
+    if not WARMUP_ENABLED:
+        return None
+
+    def run():
+        # 预加载直接调用缓存函数，不依赖服务已开始监听，延迟只是让服务先完成启动
+        time.sleep(WARMUP_DELAY)
+        try:
+            warm_up_cache()
+        except Exception as e:
+            print(f"数据预加载失败: {e}", flush=True)
+
+    thread = threading.Thread(target=run, name="cache-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,77 @@
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config.GlobalConfig import (
+    AKTOOLS_BASE_URL, CACHE_TTL, AKTOOLS_POOL_SIZE, AKTOOLS_CONNECT_TIMEOUT, AKTOOLS_READ_TIMEOUT
+)
+from config.SingleFlight import single_flight
+from config.LRUCache import cache
+
+# 共享缓存中 AkTools 响应的键前缀
+RESPONSE_KEY_PREFIX = "aktools:"
+
+
+class AkToolsClient:
+    """
+    AkTools HTTP 客户端：复用连接池和 keep-alive 连接，支持 gzip 压缩，
+    并按指标缓存响应数据。响应保存在共享的内存缓存中，计入缓存的内存上限和统计，
+    由后台线程清理。缓存过期后的宽限期内携带 ETag / Last-Modified 发起条件请求，
+    服务端返回 304 时直接复用已缓存的数据。
+    """
+
+    def __init__(self, base_url, ttl=CACHE_TTL, pool_size=AKTOOLS_POOL_SIZE,
+                 connect_timeout=AKTOOLS_CONNECT_TIMEOUT, read_timeout=AKTOOLS_READ_TIMEOUT, response_cache=cache):
+        self._base_url = base_url.rstrip("/")
+        self._ttl = ttl
+        self._timeout = (connect_timeout, read_timeout)
+        # 指标 -> (数据, ETag, Last-Modified)，过期后保留 ttl 秒用于条件请求
+        self._responses = response_cache
+
+        session = requests.Session()
+        # 连接失败时重试，读取超时不重试（AkTools 的慢接口重试只会更慢）
+        retry = Retry(total=2, connect=2, read=0, backoff_factor=0.3,
+                      status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip, deflate"})
+        self._session = session
+
+    def get(self, indicator):
+        """获取指标的原始数据，缓存有效期内直接返回缓存，同一指标的并发请求只发起一次"""
+        entry, stale = self._responses.get_stale(RESPONSE_KEY_PREFIX + indicator)
+        if entry is not None and not stale:
+            return entry[0]
+        data, _ = single_flight.do(f"aktools:{indicator}", self._fetch, indicator, entry)
+        return data
+
+    def _fetch(self, indicator, entry):
+        """请求 AkTools，entry 为已过期但仍在宽限期内的缓存响应，用于发起条件请求"""
+        key = RESPONSE_KEY_PREFIX + indicator
+        # 等待期间其他请求可能已刷新了缓存，只检查有效期内的数据，不计入命中统计
+        refreshed = self._responses.get(key, record_stats=False)
+        if refreshed is not None:
+            return refreshed[0]
+
+        headers = {}
+        if entry is not None:
+            if entry[1]:
+                headers["If-None-Match"] = entry[1]
+            if entry[2]:
+                headers["If-Modified-Since"] = entry[2]
+
+        started = time.time()
+        response = self._session.get(f"{self._base_url}/{indicator}", headers=headers, timeout=self._timeout)
+        if response.status_code == 304 and entry is not None:
+            data = entry[0]
+        else:
+            response.raise_for_status()
+            data = response.json()
+
+        self._responses.set(key, (data, response.headers.get("ETag"), response.headers.get("Last-Modified")),
+                            ttl=self._ttl, stale_ttl=self._ttl, cost=time.time() - started)
+        return data
+
+
+aktools_client = AkToolsClient(AKTOOLS_BASE_URL)
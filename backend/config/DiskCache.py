@@ -0,0 +1,81 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from config.GlobalConfig import DISK_CACHE_PATH
+
+
+class DiskCache:
+    """
+    基于 SQLite 的持久化缓存，作为 LRUCache 之后的第二级缓存。
+    数据使用 pickle 序列化，连同过期时间一起保存，后端重启后可直接读取未过期的数据。
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._conn = None
+        self._lock = threading.Lock()  # 用于线程安全
+
+    def _connect(self):
+        """首次使用时才打开数据库，并清理已超过宽限期的数据"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expire_time REAL, stale_until REAL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM cache WHERE stale_until IS NOT NULL AND stale_until < ?", (time.time(),))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def set(self, key, value, expire_time=None, stale_until=None):
+        """将数据写入磁盘，expire_time 和 stale_until 为绝对时间戳"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expire_time, stale_until, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, expire_time, stale_until, time.time())
+            )
+            conn.commit()
+
+    def get(self, key):
+        """
+        从磁盘读取数据。
+
+        返回:
+            tuple: (数据, 过期时间, 宽限期结束时间)，不存在或已超过宽限期时返回 None
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expire_time, stale_until FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        blob, expire_time, stale_until = row
+        if stale_until and stale_until < time.time():
+            self.delete(key)
+            return None
+        return pickle.loads(blob), expire_time, stale_until
+
+    def delete(self, key):
+        """删除磁盘中的某个键"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self):
+        """清空磁盘缓存"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache")
+            conn.commit()
+
+
+disk_cache = DiskCache(DISK_CACHE_PATH)
@@ -1,2 +1,43 @@
+import os
+from pathlib import Path
+
 AKTOOLS_BASE_URL = "http://127.0.0.1:8080/api/public"
-CACHE_TTL = 1200  # 缓存时间为20分钟
\ No newline at end of file
+CACHE_TTL = 1200  # 缓存时间为20分钟
+
+# 本地磁盘缓存文件，后端重启后从这里恢复历史数据
+DISK_CACHE_PATH = os.environ.get(
+    "BEATSTOCK_DISK_CACHE",
+    str(Path.home() / "Documents" / "ElonMarketData" / "akshare_cache.sqlite3")
+)
+
+# 内存缓存占用上限（字节），超过后按最近最少使用淘汰，None 表示只按数量限制
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# 淘汰时优先淘汰重新请求代价低、占用内存大的数据
+CACHE_COST_AWARE = True
+# 后台清理过期缓存的间隔（秒）
+CACHE_SWEEP_INTERVAL = 60
+# 内存缓存的分段数，每个分段独立加锁。
+# 有 GIL 的 CPython 上缓存命中只持锁几微秒，分段并不能提高吞吐，默认不分段；
+# 在无 GIL 的 Python（3.13t 及以后）上可设为 16 等值
+CACHE_SHARDS = 1
+
+# 后端启动后在后台预先加载常用数据，首次打开页面时直接命中缓存
+WARMUP_ENABLED = os.environ.get("BEATSTOCK_WARMUP", "1") != "0"
+WARMUP_WORKERS = 4  # 预加载并发数
+# 启动后延迟多少秒开始预加载。只是估计值，并不保证服务此时已开始监听；
+# 预加载直接调用缓存函数，不经过 HTTP，即使服务尚未开始监听也不影响结果
+WARMUP_DELAY = 1
+
+# 上游请求（akshare / AkTools）专用线程池大小，与 Starlette 默认线程池分开
+UPSTREAM_WORKERS = 16
+# 每类上游数据源同时进行的请求数上限
+UPSTREAM_LIMITS = {
+    "akshare": 8,
+    "aktools": 8,
+    "audio": 1,  # 音频节拍分析为 CPU 密集型任务
+}
+
+# AkTools HTTP 客户端：连接池大小与连接/读取超时（秒）
+AKTOOLS_POOL_SIZE = 16
+AKTOOLS_CONNECT_TIMEOUT = 5
+AKTOOLS_READ_TIMEOUT = 180
@@ -0,0 +1,89 @@
+import time
+import threading
+from config.DiskCache import disk_cache
+from config.GlobalConfig import CACHE_TTL
+from config.LRUCache import _start_sweeper
+
+# 磁盘缓存中处理结果的键前缀
+STORE_KEY_PREFIX = "indicator-store:"
+
+
+class IndicatorStore:
+    """
+    按指标保存处理后的 ECharts 数据及其对应原始数据的摘要，内存中保留一份，
+    同时写入磁盘缓存（不过期），后端重启后也能直接使用上次的处理结果。
+    对应的原始数据对象只保留 raw_ttl 秒（与 AkTools 响应缓存的有效期相同），用于快速比对，
+    过期后释放，不会让原始数据一直占用内存。
+    """
+
+    def __init__(self, disk=disk_cache, raw_ttl=CACHE_TTL):
+        self._disk = disk
+        self._raw_ttl = raw_ttl
+        self._records = {}  # 指标 -> (处理结果记录, 对应的原始数据对象, 原始数据的释放时间)
+        self._lock = threading.Lock()  # 用于线程安全
+        self._stats = {"unchanged": 0, "incremental": 0, "rebuilt": 0}
+        self._sweeper = None  # 后台释放过期原始数据的线程
+
+    def get(self, indicator):
+        """
+        读取指标的处理结果记录，内存中没有时从磁盘恢复。
+
+        返回:
+            tuple: (记录, 生成记录时的原始数据对象)，从磁盘恢复或原始数据已释放时原始数据对象为 None，
+                   没有记录时返回 (None, None)
+        """
+        with self._lock:
+            entry = self._records.get(indicator)
+        if entry is not None:
+            record, raw, raw_until = entry
+            return (record, raw) if raw_until >= time.time() else (record, None)
+        try:
+            stored = self._disk.get(STORE_KEY_PREFIX + indicator)
+        except Exception as e:
+            print(f"读取指标处理结果失败: {indicator}: {e}")
+            return None, None
+        if stored is None:
+            return None, None
+        with self._lock:
+            entry = self._records.setdefault(indicator, (stored[0], None, 0))
+        return entry[0], None
+
+    def put(self, indicator, record, raw=None, persist=True):
+        """保存指标的处理结果记录，raw 为对应的原始数据对象，只在内存中保留 raw_ttl 秒用于快速比对"""
+        with self._lock:
+            self._records[indicator] = (record, raw, time.time() + self._raw_ttl if raw is not None else 0)
+        if not persist:
+            return
+        try:
+            self._disk.set(STORE_KEY_PREFIX + indicator, record)
+        except Exception as e:
+            print(f"写入指标处理结果失败: {indicator}: {e}")
+
+    def record(self, event):
+        """记录一次处理方式：unchanged / incremental / rebuilt"""
+        with self._lock:
+            self._stats[event] += 1
+
+    def clean_expired(self):
+        """释放已超过 raw_ttl 的原始数据对象，处理结果记录仍然保留，返回释放的数量"""
+        now = time.time()
+        with self._lock:
+            expired = [name for name, (_, raw, raw_until) in self._records.items()
+                       if raw is not None and raw_until < now]
+            for name in expired:
+                self._records[name] = (self._records[name][0], None, 0)
+        return len(expired)
+
+    def stats(self):
+        """返回各处理方式的次数、保存的指标数量以及仍保留原始数据的指标数量"""
+        with self._lock:
+            raw = sum(1 for entry in self._records.values() if entry[1] is not None)
+            return dict(self._stats, indicators=len(self._records), raw_retained=raw)
+
+    def start_sweeper(self, interval):
+        """启动后台线程，每隔 interval 秒释放一次过期的原始数据"""
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._sweeper = _start_sweeper(self, interval)
+
+
+indicator_store = IndicatorStore()
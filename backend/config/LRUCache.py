@@ -1,59 +1,273 @@
 import time
 import threading
 from collections import OrderedDict
+from config.GlobalConfig import CACHE_MAX_BYTES, CACHE_COST_AWARE, CACHE_SHARDS
+from config.sizeof import estimate_size
+
+# 按重新计算代价淘汰时，从最久未使用的一端取多少个候选项
+EVICTION_SAMPLE = 8
+
+
+def _start_sweeper(cache, interval):
+    """启动后台线程，每隔 interval 秒调用一次 cache.clean_expired"""
+    def sweep():
+        while True:
+            time.sleep(interval)
+            try:
+                removed = cache.clean_expired()
+                if removed:
+                    print(f"清理过期缓存: {removed} 项")
+            except Exception as e:
+                print(f"清理过期缓存失败: {e}")
+
+    sweeper = threading.Thread(target=sweep, name="cache-sweeper", daemon=True)
+    sweeper.start()
+    return sweeper
 
 class LRUCache:
-    def __init__(self, max_size=100):
+    def __init__(self, max_size=100, max_bytes=None, cost_aware=False):
         self._cache = OrderedDict()  # 使用OrderedDict维护缓存顺序
         self._max_size = max_size    # 设置缓存的最大容量
+        self._max_bytes = max_bytes  # 缓存占用内存的上限（字节），None 表示不限制
+        self._cost_aware = cost_aware  # 淘汰时是否考虑重新计算的代价
+        self._bytes = 0              # 当前缓存数据估算占用的字节数
         self._lock = threading.Lock()  # 用于线程安全
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._sweeper = None         # 后台清理过期数据的线程
 
-    def set(self, key, value, ttl=None):
-        """将数据存储到缓存中，达到最大容量时淘汰最不常用的键"""
+    def set(self, key, value, ttl=None, stale_ttl=None, cost=None):
+        """
+        将数据存储到缓存中，达到最大容量时淘汰最不常用的键。
+        stale_ttl 为过期后的宽限时间（秒），宽限期内的数据可通过 get_stale 读取。
+        cost 为重新计算该数据的代价（如请求耗时秒数），开启 cost_aware 时用于淘汰决策。
+        """
         expire_time = time.time() + ttl if ttl else None
+        # 宽限期结束时间，超过该时间的数据才会被真正删除
+        stale_until = expire_time + stale_ttl if expire_time and stale_ttl else expire_time
+        self.set_entry(key, value, expire_time, stale_until, cost)
+
+    def set_entry(self, key, value, expire_time=None, stale_until=None, cost=None):
+        """按绝对时间戳存储数据，用于从磁盘缓存恢复数据"""
+        # 在锁外估算数据大小，DataFrame 的深度统计可能耗时较长
+        size = estimate_size(value) if self._max_bytes else 0
+        if self._max_bytes and size > self._max_bytes:
+            print(f"缓存数据过大（{size} 字节），超过缓存上限，不进行缓存: {key}")
+            # 删除该键已有的旧数据，避免之后继续返回过时的结果
+            with self._lock:
+                if key in self._cache:
+                    self._remove(key)
+            return
         with self._lock:
             if key in self._cache:
                 # 如果键已存在，先删除，后面再添加，确保它在末尾
-                self._cache.pop(key)
+                self._remove(key)
             # 添加新键，或将其移动到末尾
-            self._cache[key] = (value, expire_time)
-            # 如果超过最大缓存容量，移除最不常使用的键（最前面的项）
-            if len(self._cache) > self._max_size:
-                self._cache.popitem(last=False)  # 删除最前面的键，即最少使用的
+            self._cache[key] = (value, expire_time, stale_until, size, cost or 0)
+            self._bytes += size
+            self._evict()
 
-    def get(self, key):
-        """从缓存中获取数据，如果缓存项已过期或不存在，则返回None"""
+    def _remove(self, key):
+        """删除键并更新占用的字节数，调用方需持有锁"""
+        entry = self._cache.pop(key)
+        self._bytes -= entry[3]
+        return entry
+
+    def _evict(self):
+        """淘汰数据直到满足数量和内存上限，调用方需持有锁"""
+        # 如果超过最大缓存容量，移除最不常使用的键（最前面的项）
+        while len(self._cache) > self._max_size:
+            self._remove(next(iter(self._cache)))  # 删除最前面的键，即最少使用的
+            self._stats["evictions"] += 1
+        if not self._max_bytes:
+            return
+        while self._bytes > self._max_bytes and len(self._cache) > 1:
+            self._remove(self._pick_victim())
+            self._stats["evictions"] += 1
+
+    def _pick_victim(self):
+        """选出要淘汰的键，调用方需持有锁"""
+        if not self._cost_aware:
+            return next(iter(self._cache))
+        # 在最久未使用的若干项中，优先淘汰每字节重新计算代价最低的项
+        victim, victim_score = None, None
+        for i, (key, entry) in enumerate(self._cache.items()):
+            if i >= EVICTION_SAMPLE or i == len(self._cache) - 1:
+                break
+            size, cost = entry[3], entry[4]
+            score = cost / size if size else float("inf")
+            if victim_score is None or score < victim_score:
+                victim, victim_score = key, score
+        return victim if victim is not None else next(iter(self._cache))
+
+    def get(self, key, record_stats=True):
+        """
+        从缓存中获取数据，如果缓存项已过期或不存在，则返回None。
+        record_stats=False 时不计入命中统计，用于同一次请求中的重复检查。
+        """
         with self._lock:
-            if key not in self._cache:
+            entry = self._cache.get(key)
+            if entry is None:
+                if record_stats:
+                    self._stats["misses"] += 1
                 return None
-            value, expire_time = self._cache.pop(key)  # 弹出项
+            value, expire_time, stale_until = entry[0], entry[1], entry[2]
+            now = time.time()
             # 检查是否过期
-            if expire_time and expire_time < time.time():
+            if expire_time and expire_time < now:
+                # 超过宽限期的数据直接删除，宽限期内的数据保留给 get_stale 使用
+                if not (stale_until and stale_until >= now):
+                    self._remove(key)
+                    self._stats["expirations"] += 1
+                if record_stats:
+                    self._stats["misses"] += 1
                 return None
-            # 将键重新插入到字典末尾，表示它是最近使用的
-            self._cache[key] = (value, expire_time)
+            # 将键移动到字典末尾，表示它是最近使用的
+            self._cache.move_to_end(key)
+            if record_stats:
+                self._stats["hits"] += 1
             return value
 
+    def get_stale(self, key):
+        """
+        从缓存中获取数据，允许读取已过期但仍在宽限期内的数据。
+
+        返回:
+            tuple: (数据, 是否已过期)，数据不存在或超过宽限期时返回 (None, False)
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None, False
+            value, expire_time, stale_until = entry[0], entry[1], entry[2]
+            now = time.time()
+            if stale_until and stale_until < now:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None, False
+            self._cache.move_to_end(key)
+            stale = bool(expire_time and expire_time < now)
+            self._stats["stale_hits" if stale else "hits"] += 1
+            return value, stale
+
+    def expire_time(self, key):
+        """返回缓存项的过期时间戳，不存在或永不过期时返回 None，不计入命中统计"""
+        with self._lock:
+            entry = self._cache.get(key)
+            return entry[1] if entry is not None else None
+
     def delete(self, key):
         """删除缓存中的某个键"""
         with self._lock:
             if key in self._cache:
-                self._cache.pop(key)
+                self._remove(key)
 
     def clear(self):
         """清空缓存"""
         with self._lock:
             self._cache.clear()
+            self._bytes = 0
 
     def clean_expired(self):
         """手动清理过期的缓存项"""
         with self._lock:
             keys_to_delete = []
-            for key, (value, expire_time) in self._cache.items():
-                if expire_time and expire_time < time.time():
+            for key, entry in self._cache.items():
+                stale_until = entry[2]
+                if stale_until and stale_until < time.time():
                     keys_to_delete.append(key)
             for key in keys_to_delete:
-                self._cache.pop(key)
+                self._remove(key)
+            self._stats["expirations"] += len(keys_to_delete)
+        return len(keys_to_delete)
+
+    def size_in_bytes(self):
+        """返回当前缓存数据估算占用的字节数"""
+        with self._lock:
+            return self._bytes
+
+    def stats(self):
+        """返回缓存的统计数据：命中、未命中、淘汰、过期次数以及占用内存"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._cache), bytes=self._bytes,
+                        max_size=self._max_size, max_bytes=self._max_bytes)
+
+    def start_sweeper(self, interval):
+        """启动后台线程，每隔 interval 秒清理一次超过宽限期的缓存项"""
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._sweeper = _start_sweeper(self, interval)
+
+
+class ShardedLRUCache:
+    """
+    分段加锁的 LRU 缓存：按键的哈希值将数据分到多个相互独立的 LRUCache 中，
+    每个分段有自己的锁，不同键的读写不会互相阻塞。接口与 LRUCache 相同，
+    最近最少使用、数量上限和内存上限在每个分段内分别生效。
+    """
+
+    def __init__(self, shards=16, max_size=100, max_bytes=None, cost_aware=False):
+        self._shards = [
+            LRUCache(
+                max_size=max(1, max_size // shards),
+                max_bytes=max_bytes // shards if max_bytes else None,
+                cost_aware=cost_aware,
+            )
+            for _ in range(shards)
+        ]
+        self._count = shards
+        self._sweeper = None
+
+    def _shard(self, key):
+        return self._shards[hash(key) % self._count]
+
+    def set(self, key, value, ttl=None, stale_ttl=None, cost=None):
+        self._shard(key).set(key, value, ttl, stale_ttl, cost)
+
+    def set_entry(self, key, value, expire_time=None, stale_until=None, cost=None):
+        self._shard(key).set_entry(key, value, expire_time, stale_until, cost)
+
+    def get(self, key, record_stats=True):
+        return self._shard(key).get(key, record_stats)
+
+    def get_stale(self, key):
+        return self._shard(key).get_stale(key)
+
+    def expire_time(self, key):
+        return self._shard(key).expire_time(key)
+
+    def delete(self, key):
+        self._shard(key).delete(key)
+
+    def clear(self):
+        for shard in self._shards:
+            shard.clear()
+
+    def clean_expired(self):
+        return sum(shard.clean_expired() for shard in self._shards)
+
+    def size_in_bytes(self):
+        return sum(shard.size_in_bytes() for shard in self._shards)
+
+    def stats(self):
+        """汇总所有分段的统计数据"""
+        total = {}
+        for shard in self._shards:
+            for name, value in shard.stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    total[name] = total.get(name, 0) + value
+                else:
+                    total.setdefault(name, value)
+        total["shards"] = len(self._shards)
+        return total
+
+    def start_sweeper(self, interval):
+        """启动后台线程，每隔 interval 秒清理一次所有分段中超过宽限期的缓存项"""
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._sweeper = _start_sweeper(self, interval)
 
 # 示例使用
-cache = LRUCache(max_size=1024)
\ No newline at end of file
+if CACHE_SHARDS > 1:
+    cache = ShardedLRUCache(shards=CACHE_SHARDS, max_size=1024, max_bytes=CACHE_MAX_BYTES, cost_aware=CACHE_COST_AWARE)
+else:
+    cache = LRUCache(max_size=1024, max_bytes=CACHE_MAX_BYTES, cost_aware=CACHE_COST_AWARE)
@@ -0,0 +1,85 @@
+import threading
+
+
+class _Call:
+    """一次正在进行中的上游调用，等待者通过 event 获取结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    合并同一个键上的并发请求：同一时刻只有一个调用者（leader）真正执行函数，
+    其余调用者等待 leader 的结果，leader 抛出的异常也会原样传递给等待者。
+    """
+
+    def __init__(self):
+        self._calls = {}               # key -> _Call
+        self._lock = threading.Lock()  # 用于线程安全
+        self._stats = {"calls": 0, "executed": 0, "deduplicated": 0, "timeouts": 0, "errors": 0}
+
+    def do(self, key, fn, *args, timeout=None, **kwargs):
+        """
+        执行 fn(*args, **kwargs)，若相同 key 的调用正在进行，则等待其结果。
+
+        参数:
+            key: 合并请求所用的键。
+            fn: 实际执行的函数。
+            timeout (float): 等待者最多等待的秒数，超时抛出 TimeoutError，None 表示一直等待。
+
+        返回:
+            tuple: (结果, 是否为合并的调用)
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["deduplicated"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            if not call.event.wait(timeout):
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise TimeoutError(f"等待请求 {key} 的结果超时（{timeout} 秒）")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            # 先移除键再唤醒等待者，保证之后的新请求会重新发起调用
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result, False
+
+    def in_flight(self):
+        """返回当前正在进行中的调用数量"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """返回请求合并的统计数据"""
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
+
+
+# 全局实例，供 cached_akshare_request 使用
+single_flight = SingleFlight()
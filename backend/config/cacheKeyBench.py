@@ -0,0 +1,60 @@
+"""
+缓存键生成的基准测试：比较按函数签名绑定参数后摘要生成的缓存键，
+与改动前直接拼接文件路径、函数名和参数字符串的缓存键，以及完整缓存命中的耗时。
+
+在 backend 目录下运行：python -m config.cacheKeyBench
+"""
+import argparse
+import contextlib
+import inspect
+import io
+import os
+import timeit
+from config.cached_akshare_request import cached_akshare_request, _make_key_builder
+
+CALLS = 100000
+
+
+def sample(indicator="今日", sector_type="行业资金流"):
+    """被缓存的示例函数，参数形式与板块资金流接口相同"""
+    return indicator, sector_type
+
+
+def legacy_key(func, args, kwargs):
+    """改动前的缓存键：每次调用都获取文件路径，并拼接参数的字符串形式"""
+    return f"{os.path.abspath(inspect.getfile(func))}:{func.__name__}:{args}:{kwargs}"
+
+
+def per_call_us(fn, calls):
+    return timeit.timeit(fn, number=calls) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缓存键生成与缓存命中的耗时")
+    parser.add_argument("--calls", type=int, default=CALLS, help="每项测试的调用次数")
+    args = parser.parse_args()
+
+    args_, kwargs = ("今日",), {"sector_type": "行业资金流"}
+    build_key = _make_key_builder(sample)
+    # f(x)、f(indicator=x) 和使用默认值的 f() 得到相同的键
+    assert build_key(args_, kwargs) == build_key((), {"indicator": "今日"}) == build_key((), {})
+
+    cached = cached_akshare_request(sample)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cached(*args_, **kwargs)
+        hit = per_call_us(lambda: cached(*args_, **kwargs), args.calls)
+
+    uncached_build = _make_key_builder(sample)
+    counter = iter(range(10 ** 9))
+    results = [
+        ("旧缓存键（拼接字符串）", per_call_us(lambda: legacy_key(sample, args_, kwargs), args.calls)),
+        ("新缓存键（已记住的参数）", per_call_us(lambda: build_key(args_, kwargs), args.calls)),
+        ("新缓存键（首次出现的参数）", per_call_us(lambda: uncached_build((next(counter),), kwargs), args.calls)),
+        ("完整缓存命中", hit),
+    ]
+    for name, us in results:
+        print(f"{name:<16} {us:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,277 @@
 import os
+import time
+import hashlib
 import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+import pandas as pd
 from config.LRUCache import cache  # 假设你已经实现了LRU缓存工具类
+from config.SingleFlight import single_flight
+from config.DiskCache import disk_cache
+from config.ttlPolicy import resolve_ttl
 
 CACHE_TTL = 3600  # 1小时缓存有效期（秒）
+REQUEST_WAIT_TIMEOUT = 180  # 等待同一请求结果的最长时间（秒）
+REFRESH_WORKERS = 4  # 后台刷新过期缓存的线程数
+KEY_MEMO_SIZE = 1024  # 每个函数最多记住的缓存键数量
+
+# 后台刷新线程池，以及正在刷新的缓存键
+_refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+# 每个被装饰函数的命中统计
+_function_stats = {}
+_function_stats_lock = threading.Lock()
+
+# 当前线程中正在执行的被装饰函数对缓存有效期的上限（秒），每层调用一项
+_ttl_limits = threading.local()
+
+
+def limit_ttl(seconds):
+    """
+    在被装饰函数执行期间调用，限制本次结果的缓存有效期不超过 seconds 秒，
+    用于由其它缓存数据计算出的结果，使其不会比所依赖的数据过期得更晚。
+    """
+    limits = getattr(_ttl_limits, "stack", None)
+    if limits:
+        limits[-1] = min(limits[-1], max(0, seconds))
+
+
+def _record(name, event):
+    """记录一次函数级别的缓存事件：hits / stale_hits / misses / coalesced"""
+    with _function_stats_lock:
+        stats = _function_stats.get(name)
+        if stats is None:
+            stats = _function_stats[name] = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0}
+        stats[event] += 1
+
+
+def function_stats():
+    """返回每个被装饰函数的缓存统计及命中率"""
+    with _function_stats_lock:
+        result = {}
+        for name, stats in _function_stats.items():
+            served = stats["hits"] + stats["stale_hits"] + stats["coalesced"]
+            total = served + stats["misses"]
+            result[name] = dict(stats, hit_ratio=round(served / total, 4) if total else None)
+        return result
+
+
+def _schedule_refresh(cache_key, fetch, name):
+    """在后台刷新已过期的缓存项，同一个键同时只会有一个刷新任务"""
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+
+    def refresh():
+        try:
+            single_flight.do(cache_key, fetch)
+        except Exception as e:
+            # 刷新失败时继续使用旧数据，等待下一次刷新
+            print(f"后台刷新缓存失败: {name}: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(cache_key)
+
+    _refresh_executor.submit(refresh)
+
+
+def _make_key_builder(func):
+    """
+    生成缓存键的函数。参数按函数签名绑定并补齐默认值，f(x) 与 f(x=x) 得到相同的键，
+    再将模块名、函数名和参数摘要为固定长度的字符串。
+    键不包含文件路径，打包运行时每次启动的解压目录都不同，磁盘缓存也能复用同一个键。
+    """
+    signature = inspect.signature(func)
+    prefix = f"{func.__module__}.{func.__qualname__}"
+    parameters = list(signature.parameters.values())
+    names = [p.name for p in parameters]
+    defaults = {p.name: p.default for p in parameters if p.default is not inspect.Parameter.empty}
+    # 只有普通参数时，直接按参数名补齐，避免每次调用 signature.bind 的开销
+    simple = all(p.kind is inspect.Parameter.POSITIONAL_OR_KEYWORD for p in parameters)
+
+    # 相同的调用参数直接复用已计算的键
+    memo = {}
+
+    def digest(arguments):
+        return f"{prefix}:{hashlib.blake2b(repr(arguments).encode('utf-8'), digest_size=16).hexdigest()}"
+
+    def build(args, kwargs):
+        try:
+            memo_key = (args, tuple(kwargs.items()))
+            return memo[memo_key]
+        except TypeError:
+            # 参数不可哈希，不使用缓存的键
+            return normalize(args, kwargs)
+        except KeyError:
+            pass
+        key = normalize(args, kwargs)
+        if len(memo) >= KEY_MEMO_SIZE:
+            memo.clear()
+        memo[memo_key] = key
+        return key
+
+    def normalize(args, kwargs):
+        if simple and len(args) <= len(names) and all(name in names for name in kwargs):
+            arguments = []
+            for i, name in enumerate(names):
+                if i < len(args):
+                    value = args[i]
+                elif name in kwargs:
+                    value = kwargs[name]
+                elif name in defaults:
+                    value = defaults[name]
+                else:
+                    # 缺少必填参数，交给原函数抛出异常
+                    return None
+                arguments.append((name, value))
+            return digest(arguments)
+
+        try:
+            bound = signature.bind(*args, **kwargs)
+        except TypeError:
+            # 参数与签名不匹配时交给原函数抛出异常
+            return None
+        bound.apply_defaults()
+        arguments = []
+        for name, value in bound.arguments.items():
+            if signature.parameters[name].kind is inspect.Parameter.VAR_KEYWORD:
+                value = sorted(value.items())
+            arguments.append((name, value))
+        return digest(arguments)
+
+    return build
+
+
+def _load_from_disk(cache_key):
+    """从磁盘缓存读取数据并放回内存缓存，返回 (数据, 是否已过期)"""
+    try:
+        entry = disk_cache.get(cache_key)
+    except Exception as e:
+        print(f"读取磁盘缓存失败: {e}")
+        return None, False
+    if entry is None:
+        return None, False
+    value, expire_time, stale_until = entry
+    cache.set_entry(cache_key, value, expire_time, stale_until)
+    return value, bool(expire_time and expire_time < time.time())
+
+
+def _save_to_disk(cache_key, value, expire_time, stale_until):
+    """将数据写入磁盘缓存，写入失败不影响正常返回"""
+    try:
+        disk_cache.set(cache_key, value, expire_time, stale_until)
+    except Exception as e:
+        print(f"写入磁盘缓存失败: {e}")
+
+
+def _share(value):
+    """
+    返回缓存数据的零拷贝视图（浅拷贝），与缓存共享底层数据。
+    以字典形式返回多个 DataFrame 时，字典本身和其中的 DataFrame 同样返回视图。
+    应用启动时开启了 pandas 写时复制（见 app.main），调用者修改视图时才会复制数据，不会改动缓存。
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, dict) and any(isinstance(v, (pd.DataFrame, pd.Series)) for v in value.values()):
+        return {k: _share(v) for k, v in value.items()}
+    return value
+
+
+def cached_akshare_request(func=None, *, ttl=CACHE_TTL, wait_timeout=REQUEST_WAIT_TIMEOUT, stale_ttl=None,
+                           persist=False, shared_view=True):
+    """
+    缓存 akshare 请求结果的装饰器，可直接使用 @cached_akshare_request，
+    也可以带参数使用 @cached_akshare_request(ttl=next_trading_day)。
+
+    ttl 为缓存有效期，可以是秒数，也可以是 config.ttlPolicy 中按交易时段计算有效期的策略函数。
+
+    同一缓存键上并发的缓存未命中会被合并，只有一个调用真正请求 akshare，
+    其余调用等待它的结果（最多 wait_timeout 秒），请求失败时异常会传递给所有等待者。
+
+    设置 stale_ttl（秒）后，缓存过期后的宽限期内仍直接返回旧数据，
+    同时在后台刷新缓存，超过宽限期才会同步请求 akshare。
+
+    设置 persist=True 后，数据会同时写入本地磁盘缓存，后端重启后优先从磁盘恢复，
+    只有已过期的数据才会重新请求 akshare。
+
+    shared_view=True（默认）时，返回的 DataFrame / Series 是缓存数据的浅拷贝视图，
+    shared_view=False 时直接返回缓存中的对象。返回值并不是只读的：视图在开启了 pandas
+    写时复制（应用启动时设置）的情况下修改才不会影响缓存，直接返回的缓存对象则不能修改。
+    """
+    if func is None:
+        return lambda f: cached_akshare_request(
+            f, ttl=ttl, wait_timeout=wait_timeout, stale_ttl=stale_ttl, persist=persist, shared_view=shared_view
+        )
+
+    # 函数所在的文件路径只在装饰时获取一次，用于日志输出
+    file_path = os.path.abspath(inspect.getfile(func))
+    build_key = _make_key_builder(func)
+    stats_name = f"{func.__module__}.{func.__qualname__}"
 
-def cached_akshare_request(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        # 获取当前函数所在的文件路径
-        file_path = os.path.abspath(inspect.getfile(func))
+        # 生成一个唯一的缓存键，基于模块、函数名称和参数
+        cache_key = build_key(args, kwargs)
+        if cache_key is None:
+            return func(*args, **kwargs)
 
-        # 生成一个唯一的缓存键，基于模块文件路径、函数名称和参数
-        cache_key = f"{file_path}:{func.__name__}:{args}:{kwargs}"
+        def fetch():
+            # 调用原始 akshare 请求
+            print(f"调用 akshare API: {func.__name__} from {file_path}")
+            started = time.time()
+            limits = _ttl_limits.__dict__.setdefault("stack", [])
+            limits.append(float("inf"))
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                ttl_limit = limits.pop()
+            # 请求耗时作为重新计算的代价，内存不足时优先淘汰代价低的数据
+            cost = time.time() - started
+
+            # 将结果存储到缓存中
+            expire_time = time.time() + min(resolve_ttl(ttl), ttl_limit)
+            stale_until = expire_time + stale_ttl if stale_ttl else expire_time
+            cache.set_entry(cache_key, result, expire_time, stale_until, cost)
+            if persist:
+                _save_to_disk(cache_key, result, expire_time, stale_until)
+            return result
+
+        def fetch_if_missing():
+            # 等待锁期间可能已有其他调用写入了缓存
+            cached_data = cache.get(cache_key, record_stats=False)
+            if cached_data is not None:
+                return cached_data
+            return fetch()
 
         # 尝试从缓存中获取数据
-        cached_data = cache.get(cache_key)
+        cached_data, stale = cache.get_stale(cache_key)
+        if cached_data is None and persist:
+            cached_data, stale = _load_from_disk(cache_key)
         if cached_data is not None:
-            print(f"从缓存中获取数据: {func.__name__} from {file_path}")
-            return cached_data
-
-        # 调用原始 akshare 请求
-        print(f"调用 akshare API: {func.__name__} from {file_path}")
-        result = func(*args, **kwargs)
-        
-        # 将结果存储到缓存中
-        cache.set(cache_key, result, ttl=CACHE_TTL)
-        return result
+            if stale:
+                print(f"缓存已过期，后台刷新: {func.__name__} from {file_path}")
+                _record(stats_name, "stale_hits")
+                _schedule_refresh(cache_key, fetch, func.__name__)
+            else:
+                print(f"从缓存中获取数据: {func.__name__} from {file_path}")
+                _record(stats_name, "hits")
+            return _share(cached_data) if shared_view else cached_data
+
+        result, shared = single_flight.do(cache_key, fetch_if_missing, timeout=wait_timeout)
+        if shared:
+            print(f"合并并发请求: {func.__name__} from {file_path}")
+        _record(stats_name, "coalesced" if shared else "misses")
+        return _share(result) if shared_view else result
+
+    def remaining_ttl(*args, **kwargs):
+        """返回相同参数的缓存数据距离过期的秒数，没有缓存或永不过期时返回 None"""
+        cache_key = build_key(args, kwargs)
+        expire_time = cache.expire_time(cache_key) if cache_key is not None else None
+        return max(0, expire_time - time.time()) if expire_time else None
 
+    wrapper.remaining_ttl = remaining_ttl
     return wrapper
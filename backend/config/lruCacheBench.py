@@ -0,0 +1,59 @@
+"""
+内存缓存的多线程基准测试：比较 LRUCache 与 ShardedLRUCache 在多个线程同时读取热点键时的吞吐量，
+用于决定 GlobalConfig.CACHE_SHARDS 的取值。
+
+在 backend 目录下运行：python -m config.lruCacheBench
+"""
+import argparse
+import threading
+import time
+from config.LRUCache import LRUCache, ShardedLRUCache
+
+HOT_KEYS = 256  # 热点键数量
+OPERATIONS = 200000  # 每轮 get 调用总次数
+THREAD_COUNTS = (1, 4, 8)
+ROUNDS = 3
+
+
+def bench(cache, threads, operations=OPERATIONS):
+    """多个线程同时读取热点键，返回每秒的 get 次数"""
+    keys = [f"indicators.bench.fetch:{i:032x}" for i in range(HOT_KEYS)]
+    for key in keys:
+        cache.set(key, key, ttl=3600)
+    per_thread = operations // threads
+
+    def work(offset):
+        get = cache.get
+        for i in range(per_thread):
+            get(keys[(i + offset) % HOT_KEYS])
+
+    workers = [threading.Thread(target=work, args=(j * 31,)) for j in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LRUCache / ShardedLRUCache 多线程吞吐量")
+    parser.add_argument("--shards", type=int, default=16, help="ShardedLRUCache 的分段数")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="每种配置运行的轮数")
+    args = parser.parse_args()
+
+    implementations = {
+        "LRUCache": lambda: LRUCache(max_size=1024),
+        f"Sharded{args.shards}": lambda: ShardedLRUCache(shards=args.shards, max_size=1024),
+    }
+    print("threads  " + "  ".join(f"{name:>18}" for name in implementations))
+    for threads in THREAD_COUNTS:
+        cells = []
+        for create in implementations.values():
+            results = [bench(create(), threads) / 1000 for _ in range(args.rounds)]
+            cells.append(f"{min(results):7.0f}-{max(results):.0f} kops/s")
+        print(f"{threads:<7}  " + "  ".join(f"{cell:>18}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
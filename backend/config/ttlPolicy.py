@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+
+# A 股交易时间以北京时间为准（Asia/Shanghai 没有夏令时，直接使用固定的 UTC+8）
+SHANGHAI_TZ = timezone(timedelta(hours=8), name="Asia/Shanghai")
+
+# 交易时段的边界：开盘、午间休市、午后开盘、收盘
+SESSION_BOUNDARIES = [(9, 30), (11, 30), (13, 0), (15, 0)]
+
+# 交易时段（上午、下午）
+TRADING_SESSIONS = [((9, 30), (11, 30)), ((13, 0), (15, 0))]
+
+# 收盘后的结算时段：收盘集合竞价成交、科创板盘后固定价格交易和资金流向的最终数据在此期间陆续更新，
+# 盘中数据在此期间仍按短时间缓存，之后才缓存到下一个交易时段
+SETTLE_WINDOW = ((15, 0), (15, 30))
+
+# 按日更新数据的过期时间点：开盘、收盘、结算时段结束。
+# 盘中获取的数据（含未完成的当日行情）最晚在收盘时过期，结算时段内获取的数据在结算结束时过期
+DAILY_BOUNDARIES = [(9, 30), (15, 0), SETTLE_WINDOW[1]]
+
+
+def _now(now=None):
+    """返回北京时间的当前时间"""
+    if now is None:
+        return datetime.now(SHANGHAI_TZ)
+    if now.tzinfo is None:
+        return now.replace(tzinfo=SHANGHAI_TZ)
+    return now.astimezone(SHANGHAI_TZ)
+
+
+def _is_trading_day(day):
+    """是否为交易日（仅排除周末，法定节假日没有日历数据，按交易日处理）"""
+    return day.weekday() < 5
+
+
+def _next_boundary(now, boundaries):
+    """返回 now 之后的第一个交易日时间点"""
+    day = now.replace(second=0, microsecond=0)
+    for offset in range(8):
+        candidate_day = day + timedelta(days=offset)
+        if not _is_trading_day(candidate_day):
+            continue
+        for hour, minute in boundaries:
+            candidate = candidate_day.replace(hour=hour, minute=minute)
+            if candidate > now:
+                return candidate
+    raise ValueError(f"无法计算 {now} 之后的交易时间点")
+
+
+def is_trading_time(now=None):
+    """当前是否处于交易时段内"""
+    now = _now(now)
+    if not _is_trading_day(now):
+        return False
+    current = (now.hour, now.minute)
+    return any(start <= current < end for start, end in TRADING_SESSIONS)
+
+
+def is_settling(now=None):
+    """当前是否处于收盘后的结算时段内"""
+    now = _now(now)
+    if not _is_trading_day(now):
+        return False
+    start, end = SETTLE_WINDOW
+    return start <= (now.hour, now.minute) < end
+
+
+def next_session_boundary(now=None):
+    """距离下一个交易时段边界（09:30/11:30/13:00/15:00）的秒数"""
+    now = _now(now)
+    return (_next_boundary(now, SESSION_BOUNDARIES) - now).total_seconds()
+
+
+def next_trading_day(now=None):
+    """
+    距离下一个按日更新时间点（09:30/15:00/15:30）的秒数。
+    适用于按日更新的历史数据：收盘结算后获取的完整数据缓存到下一个交易日开盘，
+    盘中获取的数据在收盘时过期，结算时段内获取的数据在结算结束时过期，不会带着未完成的数据跨过收盘。
+    """
+    now = _now(now)
+    return (_next_boundary(now, DAILY_BOUNDARIES) - now).total_seconds()
+
+
+def intraday(seconds):
+    """
+    盘中数据的缓存策略：交易时段内缓存 seconds 秒（不跨越时段边界），
+    收盘后的结算时段内同样缓存 seconds 秒（不超过结算时段结束），
+    其余休市期间数据不会变化，缓存到下一个时段边界。
+    """
+    def policy(now=None):
+        now = _now(now)
+        if is_settling(now):
+            end_hour, end_minute = SETTLE_WINDOW[1]
+            until_settled = (now.replace(hour=end_hour, minute=end_minute, second=0, microsecond=0) - now).total_seconds()
+            return min(seconds, until_settled)
+        until_boundary = next_session_boundary(now)
+        if is_trading_time(now):
+            return min(seconds, until_boundary)
+        return until_boundary
+
+    return policy
+
+
+def resolve_ttl(ttl):
+    """将缓存策略解析为秒数，ttl 可以是秒数或返回秒数的函数"""
+    if callable(ttl):
+        return ttl()
+    return ttl
@@ -0,0 +1,33 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from config.GlobalConfig import UPSTREAM_WORKERS, UPSTREAM_LIMITS
+
+# 上游请求专用线程池，慢请求不会占满 Starlette 默认线程池，也不会阻塞事件循环
+_executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS, thread_name_prefix="upstream")
+
+# 每类数据源的并发限制，首次使用时在事件循环中创建
+_semaphores = {}
+
+
+def _semaphore(source):
+    semaphore = _semaphores.get(source)
+    if semaphore is None:
+        semaphore = _semaphores[source] = asyncio.Semaphore(UPSTREAM_LIMITS.get(source, UPSTREAM_WORKERS))
+    return semaphore
+
+
+async def run_upstream(func, *args, source="akshare", **kwargs):
+    """
+    在上游线程池中执行阻塞的数据请求函数，并等待其结果。
+
+    参数:
+        func: 阻塞的请求函数，例如调用 akshare 的函数。
+        source (str): 数据源名称，同一数据源的并发数受 UPSTREAM_LIMITS 限制。
+
+    返回:
+        func 的返回值，func 抛出的异常会原样抛出。
+    """
+    async with _semaphore(source):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
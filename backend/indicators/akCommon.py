@@ -1,11 +1,28 @@
 import akshare as ak
+import pandas as pd
 from config.cached_akshare_request import cached_akshare_request
+from config.ttlPolicy import next_trading_day, intraday
 
-@cached_akshare_request
+SPOT_REFRESH_INTERVAL = 60  # 交易时段内 A 股实时行情快照的刷新间隔（秒）
+SPOT_TEXT_COLUMNS = ["代码", "名称"]  # 实时行情中的文本列，其余列均为数值
+
+@cached_akshare_request(ttl=next_trading_day)
 def getAMarketStocks():
     stock_info = ak.stock_info_a_code_name()
     return stock_info
 
+@cached_akshare_request(ttl=intraday(SPOT_REFRESH_INTERVAL), stale_ttl=SPOT_REFRESH_INTERVAL)
+def getSpotSnapshot():
+    """
+    获取全部 A 股的实时行情快照（ak.stock_zh_a_spot_em，5000 多行）。
+    所有需要实时行情的函数共用这一份数据，一次页面加载只请求一次。
+    数值列在缓存前统一转换为数值类型，返回的 DataFrame 可以直接筛选和统计。
+    """
+    spot_df = ak.stock_zh_a_spot_em()
+    numeric_columns = [col for col in spot_df.columns if col not in SPOT_TEXT_COLUMNS]
+    spot_df[numeric_columns] = spot_df[numeric_columns].apply(pd.to_numeric, errors="coerce")
+    return spot_df
+
 @cached_akshare_request
 def getStockBasic(symbol:str):
     stock_info = ak.stock_individual_info_em(symbol)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from config.ttlPolicy import SHANGHAI_TZ
+
+# NaT 转换为 int64 后的值
+NAT_INT64 = np.iinfo('int64').min
+
+
+def to_int64_dates(values):
+    """将日期列转换为 int64 数组（纳秒时间戳），无法解析的日期为 NAT_INT64"""
+    dates = pd.Series(values)
+    # 已经是日期类型时不需要重新解析
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors='coerce')
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    return dates.to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+def asof_positions(left_dates, right_dates):
+    """
+    right_dates 为升序排列的 int64 日期数组，返回每个 left 日期在 right 中
+    不晚于它的最后一个位置，没有这样的位置时为 -1。
+    """
+    return np.searchsorted(right_dates, left_dates, side='right') - 1
+
+
+def _sorted_dates(frame, date_column):
+    """返回按日期稳定排序、去掉无效日期后的 (数据, int64 日期数组)"""
+    dates = to_int64_dates(frame[date_column])
+    valid = dates != NAT_INT64
+    order = np.argsort(dates[valid], kind='stable')
+    return frame[valid].iloc[order], dates[valid][order]
+
+
+def asof_join(left, left_on, right, right_on, columns):
+    """
+    按日期向后（backward）对齐：left 的每一行取 right 中日期不晚于该行日期的最新数据，
+    只使用当时已经公布的数据，不会用未来的数据填充更早的日期。
+    columns 中的每一列分别取最新的非空值；left 的日期早于 right 中所有数据时为空值。
+
+    :param left: 需要对齐的数据，行的顺序保持不变
+    :param left_on: left 的日期列
+    :param right: 提供数据的 DataFrame，不需要预先排序
+    :param right_on: right 的日期列
+    :param columns: 需要从 right 取出的列
+    :return: 增加了 columns 列的 left（浅拷贝）
+    """
+    result = left.copy(deep=False)
+    left_dates = to_int64_dates(left[left_on])
+    right, right_dates = _sorted_dates(right, right_on)
+    for column in columns:
+        values = right[column]
+        present = values.notna().to_numpy()
+        positions = asof_positions(left_dates, right_dates[present])
+        # 无效的日期不匹配任何数据
+        positions[left_dates == NAT_INT64] = -1
+        result[column] = pd.api.extensions.take(values.to_numpy()[present], positions, allow_fill=True)
+    return result
+
+
+def latest_as_of(frame, date_column, columns=None, as_of=None):
+    """
+    返回日期不晚于 as_of（默认为北京时间的当前时间）且 columns 均不为空的最新一条记录，
+    用于排除已排期但尚未公布（值为空）的数据以及未来日期的数据。
+
+    :return: 只包含一行的 DataFrame，没有符合条件的记录时为空 DataFrame
+    """
+    if as_of is None:
+        as_of = datetime.now(SHANGHAI_TZ).replace(tzinfo=None)
+    dates = to_int64_dates(frame[date_column])
+    eligible = (dates != NAT_INT64) & (dates <= pd.Timestamp(as_of).value)
+    if columns:
+        eligible &= frame[columns].notna().all(axis=1).to_numpy()
+    candidates = np.flatnonzero(eligible)
+    if len(candidates) == 0:
+        return frame.iloc[0:0]
+    # 日期相同时取排在后面的记录
+    latest = candidates[np.lexsort((candidates, dates[candidates]))[-1]]
+    return frame.iloc[[latest]]
@@ -1,6 +1,14 @@
+import hashlib
+import itertools
+import threading
+import numpy as np
 import pandas as pd
 import akshare as ak
-from config.cached_akshare_request import cached_akshare_request
+from config.cached_akshare_request import cached_akshare_request, CACHE_TTL
+from config.LRUCache import cache
+from config.SingleFlight import single_flight
+from config.ttlPolicy import next_trading_day
+from indicators.asofJoin import asof_join
 
 # 定义常量
 BASE_PE_RATIO = 15  # 基准市盈率
@@ -8,40 +16,61 @@ BASE_INTEREST_RATE = 0.035  # 基准利率
 BASE_CPI = 0.02  # 目标CPI
 BASE_LEVERAGE_RATE = 0.5  # 基准杠杆率
 
+# 宏观数据最早公布之前的日期没有可用数据，使用基准值计算优化巴菲特指标（数据源中的单位为百分比）
+BASELINE_INPUTS = {
+    '平均市盈率': BASE_PE_RATIO,
+    'LPR1Y': BASE_INTEREST_RATE * 100,
+    '政府部门': BASE_LEVERAGE_RATE * 100,
+    '今值': BASE_CPI * 100,
+}
+
+# 优化巴菲特指标的调整系数
+PE_WEIGHT = 0.2  # 市盈率
+INTEREST_WEIGHT = 0.15  # 利率
+LEVERAGE_WEIGHT = 0.1  # 杠杆率
+INFLATION_WEIGHT = 0.1  # 通胀
+
 # 获取经典的巴菲特指标
-@cached_akshare_request
+@cached_akshare_request(ttl=next_trading_day, stale_ttl=CACHE_TTL, persist=True)
 def get_buffett_data():
     buffett_data = ak.stock_buffett_index_lg()
+    # 日期列在缓存前转换一次，之后的请求直接复用
+    buffett_data['日期'] = pd.to_datetime(buffett_data['日期'])
     return buffett_data
 
 # 获取中国 CPI 月率报告
-@cached_akshare_request
+@cached_akshare_request(ttl=next_trading_day, stale_ttl=CACHE_TTL, persist=True)
 def get_cpi_data():
     cpi_data = ak.macro_china_cpi_monthly()
+    cpi_data['日期'] = pd.to_datetime(cpi_data['日期'])
     return cpi_data
 
 # 获取 LPR 品种数据
-@cached_akshare_request
+@cached_akshare_request(ttl=next_trading_day, stale_ttl=CACHE_TTL, persist=True)
 def get_lpr_data():
     lpr_data = ak.macro_china_lpr()
+    lpr_data['TRADE_DATE'] = pd.to_datetime(lpr_data['TRADE_DATE'])
     return lpr_data
 
 # 获取宏观经济杠杆率
-@cached_akshare_request
+@cached_akshare_request(ttl=next_trading_day, stale_ttl=CACHE_TTL, persist=True)
 def get_macro_leverage_data():
     macro_leverage_data = ak.macro_cnbs()
+    macro_leverage_data['年份'] = pd.to_datetime(macro_leverage_data['年份'], format='%Y-%m')
     return macro_leverage_data
 
 # 获取主板市盈率
-@cached_akshare_request
+@cached_akshare_request(ttl=next_trading_day, stale_ttl=CACHE_TTL, persist=True)
 def get_pe_data():
     pe_data = ak.stock_market_pe_lg(symbol="上证")
+    pe_data['日期'] = pd.to_datetime(pe_data['日期'])
     return pe_data
 
 # 获取上证指数的历史行情
-@cached_akshare_request
+@cached_akshare_request(ttl=next_trading_day, stale_ttl=CACHE_TTL, persist=True)
 def get_stock_zh_index_data():
     stock_zh_index_daily_em_df = ak.stock_zh_index_daily_em(symbol="sh000001")
+    stock_zh_index_daily_em_df['date'] = pd.to_datetime(stock_zh_index_daily_em_df['date'])
     return stock_zh_index_daily_em_df
 
 # 获取上证指数的实时行情
@@ -51,98 +80,217 @@ def get_stock_zh_real_time():
     return filtered_df
 
 
-# 统一所有数据到 "日" 单位，填充缺失的日期
-def fill_daily_data(monthly_data, start_date, end_date, date_column):
-    monthly_data[date_column] = pd.to_datetime(monthly_data[date_column])
-    date_range = pd.date_range(start=start_date, end=end_date)
-    daily_data = pd.DataFrame({date_column: date_range})
-    daily_data = pd.merge_asof(daily_data, monthly_data.sort_values(date_column), on=date_column, direction='backward')
-    return daily_data
+# 各数据源的日期列
+SOURCE_DATE_COLUMNS = {"buffett": "日期", "cpi": "日期", "lpr": "TRADE_DATE", "leverage": "年份", "pe": "日期", "stock": "date"}
 
-# @cached(ttl=CACHE_TTL, serializer=JsonSerializer())
-def merge_buffett_indicator():
-    """合并所有数据集并计算巴菲特指标"""
-    # 获取最新数据
-    buffett_data = get_buffett_data()
-    cpi_data = get_cpi_data()
-    lpr_data = get_lpr_data()
-    macro_leverage_data = get_macro_leverage_data()
-    pe_data = get_pe_data()
-    stock_zh_index_daily_df = get_stock_zh_index_data()
-
-    # 将日期列转换为 datetime 类型
-    buffett_data['日期'] = pd.to_datetime(buffett_data['日期'])
-    cpi_data['日期'] = pd.to_datetime(cpi_data['日期'])
-    lpr_data['TRADE_DATE'] = pd.to_datetime(lpr_data['TRADE_DATE'])
-    macro_leverage_data['年份'] = pd.to_datetime(macro_leverage_data['年份'], format='%Y-%m')
-    pe_data['日期'] = pd.to_datetime(pe_data['日期'])
-    stock_zh_index_daily_df['date'] = pd.to_datetime(stock_zh_index_daily_df['date'])
+# 已物化的合并结果：合并后的数据、最新日期、各数据源的摘要，数据源未变化时直接复用。
+# output 为包含推算日期的最终数据，version 在 output 更新时从 _versions 取新值，在进程内不会重复
+_merged_state = {"frame": None, "last_date": None, "history": None, "signature": None,
+                 "output": None, "version": 0}
+_merged_lock = threading.Lock()
+_versions = itertools.count(1)
 
-    # 合并数据
-    merged_data = pd.merge(buffett_data, cpi_data[['日期', '今值']], on='日期', how='left')
-    merged_data = pd.merge(merged_data, lpr_data[['TRADE_DATE', 'LPR1Y']], left_on='日期', right_on='TRADE_DATE', how='left')
-    merged_data = pd.merge(merged_data, macro_leverage_data[['年份', '政府部门']], left_on='日期', right_on='年份', how='left')
-    merged_data = pd.merge(merged_data, pe_data[['日期', '平均市盈率']], on='日期', how='left')
-    merged_data = pd.merge(merged_data, stock_zh_index_daily_df[['date', 'open', 'high', 'low', 'close', 'volume']],
-                           left_on='日期', right_on='date', how='left')
+# 由 output 生成的结果（完整列表、按周期汇总的数据）保存在共享的内存缓存中，键包含版本号，
+# 数据更新后旧版本的结果不再被访问，由缓存按有效期和内存上限淘汰
+VIEW_KEY_PREFIX = "buffett-view:"
 
-    # 填充缺失值
-    merged_data.fillna(method='ffill', inplace=True)
-    merged_data.fillna(method='bfill', inplace=True)
 
-    # 计算经典的巴菲特指标并保留 3 位小数
-    merged_data['经典巴菲特指标'] = (merged_data['总市值'] / merged_data['GDP']).round(3)
+def load_buffett_sources():
+    """获取计算巴菲特指标所需的数据源，只保留用到的列，日期列已在各数据获取函数中转换为 datetime 类型"""
+    return {
+        "buffett": get_buffett_data(),
+        "cpi": get_cpi_data()[['日期', '今值']],
+        "lpr": get_lpr_data()[['TRADE_DATE', 'LPR1Y']],
+        "leverage": get_macro_leverage_data()[['年份', '政府部门']],
+        "pe": get_pe_data()[['日期', '平均市盈率']],
+        "stock": get_stock_zh_index_data()[['date', 'open', 'high', 'low', 'close', 'volume']],
+    }
+
+
+def _row_hashes(sources):
+    """计算各数据源每条记录的哈希值，返回 数据源 -> (日期数组, 哈希数组)"""
+    return {
+        name: (frame[SOURCE_DATE_COLUMNS[name]].to_numpy(), pd.util.hash_pandas_object(frame, index=False).to_numpy())
+        for name, frame in sources.items()
+    }
+
 
-    # 计算优化后的巴菲特指标并保留 3 位小数
-    merged_data['优化巴菲特指标'] = merged_data.apply(calculate_optimized_buffett_index, axis=1)
+def _digest(hashes):
+    """一组记录哈希值的摘要"""
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
 
+
+def _history_digests(row_hashes, last_date):
+    """各数据源中不晚于 last_date 的记录的摘要，用于判断历史数据是否被修订"""
+    last_date = np.datetime64(last_date)
+    return {name: _digest(hashes[dates <= last_date]) for name, (dates, hashes) in row_hashes.items()}
+
+
+def _merge_sources(sources, buffett_data):
+    """
+    将各数据源按日期向后对齐到巴菲特指标数据上：每个日期取当时已公布的最新数据，
+    最早的数据公布之前没有可用数据时，宏观数据使用基准值。
+    """
+    merged_data = asof_join(buffett_data, '日期', sources['cpi'], '日期', ['今值'])
+    merged_data = asof_join(merged_data, '日期', sources['lpr'], 'TRADE_DATE', ['LPR1Y'])
+    merged_data = asof_join(merged_data, '日期', sources['leverage'], '年份', ['政府部门'])
+    merged_data = asof_join(merged_data, '日期', sources['pe'], '日期', ['平均市盈率'])
+    merged_data = asof_join(merged_data, '日期', sources['stock'], 'date', ['open', 'high', 'low', 'close', 'volume'])
+    return merged_data.fillna(BASELINE_INPUTS)
+
+
+def _calculate_indices(merged_data):
+    """计算经典和优化后的巴菲特指标，保留 3 位小数"""
+    merged_data['经典巴菲特指标'] = (merged_data['总市值'] / merged_data['GDP']).round(3)
+    merged_data['优化巴菲特指标'] = calculate_optimized_buffett_indices(merged_data)
     # 进一步确保所有数值列保留 3 位小数
     merged_data[['经典巴菲特指标', '优化巴菲特指标']] = merged_data[['经典巴菲特指标', '优化巴菲特指标']].round(3)
+    return merged_data
 
-    # 检查巴菲特数据和指数数据的最新日期，如果指数数据有更新，则推算巴菲特指标
-    buffett_latest_date = merged_data['日期'].max()
-    stock_latest_date = stock_zh_index_daily_df['date'].max()
 
-    if buffett_latest_date < stock_latest_date:
-        merged_data = calculate_missing_buffett_index(merged_data, stock_zh_index_daily_df, buffett_latest_date)
+def _rebuild_merged_frame(sources):
+    """合并全部历史数据并计算巴菲特指标"""
+    return _calculate_indices(_merge_sources(sources, sources['buffett']))
 
-    # 将日期格式统一为 yyyy-mm-dd
-    merged_data['日期'] = merged_data['日期'].dt.strftime('%Y-%m-%d')
 
-    # 返回需要的列
-    df = merged_data[['日期', '收盘价', '总市值', 'GDP', '经典巴菲特指标', '优化巴菲特指标', 'open', 'high', 'low', 'close', 'volume']]
-    return df.to_dict(orient='records')
+def _append_merged_frame(sources, frame, last_date):
+    """
+    只合并和计算晚于 last_date 的记录。每一行只依赖当时已公布的数据，
+    新增记录的计算结果与重新合并全部历史数据相同。
+    """
+    buffett_data = sources['buffett']
+    new_data = buffett_data[buffett_data['日期'] > last_date]
+    if new_data.empty:
+        return frame
+    new_data = _calculate_indices(_merge_sources(sources, new_data))
+    return pd.concat([frame, new_data], ignore_index=True)
 
-# 动态推算缺失的巴菲特指标
-def calculate_missing_buffett_index(merged_data, stock_data, buffett_latest_date):
-    stock_latest_date = stock_data['date'].max()
-    missing_dates = pd.date_range(start=buffett_latest_date + pd.Timedelta(days=1), end=stock_latest_date)
 
-    last_known_row = merged_data[merged_data['日期'] == buffett_latest_date].iloc[0]
+def materialize_buffett_frame(sources):
+    """
+    返回合并后的巴菲特指标数据（推算缺失日期之前），按需增量更新已物化的结果：
+    数据源没有变化时直接复用；只新增了晚于最新日期的数据时只合并新增的记录；
+    任何数据源修订了最新日期及之前的历史数据时重新合并全部数据。
+    """
+    row_hashes = _row_hashes(sources)
+    signature = {name: _digest(hashes) for name, (_, hashes) in row_hashes.items()}
+    state = _merged_state
+    if state['frame'] is not None and state['signature'] == signature:
+        return state['frame'], False
+
+    frame = None
+    buffett_data = sources['buffett']
+    if state['frame'] is not None and buffett_data['日期'].is_monotonic_increasing:
+        if _history_digests(row_hashes, state['last_date']) == state['history']:
+            frame = _append_merged_frame(sources, state['frame'], state['last_date'])
+    if frame is None:
+        print("重新合并巴菲特指标的全部历史数据")
+        frame = _rebuild_merged_frame(sources)
+    else:
+        print(f"增量合并巴菲特指标: {len(frame) - len(state['frame'])} 条新记录")
+
+    last_date = frame['日期'].iloc[-1]
+    state.update(frame=frame, last_date=last_date, signature=signature,
+                 history=_history_digests(row_hashes, last_date))
+    return frame, True
+
+
+# 巴菲特指标接口返回的列
+BUFFETT_COLUMNS = ['日期', '收盘价', '总市值', 'GDP', '经典巴菲特指标', '优化巴菲特指标', 'open', 'high', 'low', 'close', 'volume']
+
 
-    for missing_date in missing_dates:
-        stock_row = stock_data[stock_data['date'] == missing_date]
-        if stock_row.empty:
-            break
+def to_records(df):
+    """转换为字典列表，缺失值（NaN）转换为 None，保证可以序列化为 JSON"""
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
 
-        index_change_ratio = (stock_row['close'].values[0] - last_known_row['close']) / last_known_row['close']
 
-        new_row = {
-            '日期': missing_date,
-            '收盘价': stock_row['close'].values[0],
-            '总市值': last_known_row['总市值'] * (1 + index_change_ratio),
+def get_buffett_frame():
+    """
+    返回巴菲特指标数据及其版本号：(DataFrame, 版本号)。
+    DataFrame 按日期升序排列，包含 BUFFETT_COLUMNS 列（日期为 datetime 类型）以及按指数行情推算的日期，
+    数据源未变化时返回同一份数据，版本号不变。返回的数据由所有调用者共享，不要修改。
+    """
+    sources = load_buffett_sources()
+    stock_zh_index_daily_df = sources['stock']
+
+    with _merged_lock:
+        merged_data, changed = materialize_buffett_frame(sources)
+        if changed or _merged_state['output'] is None:
+            # 检查巴菲特数据和指数数据的最新日期，如果指数数据有更新，则推算巴菲特指标
+            buffett_latest_date = merged_data['日期'].max()
+            stock_latest_date = stock_zh_index_daily_df['date'].max()
+
+            if buffett_latest_date < stock_latest_date:
+                merged_data = calculate_missing_buffett_index(merged_data, stock_zh_index_daily_df, buffett_latest_date)
+
+            _merged_state.update(output=merged_data[BUFFETT_COLUMNS], version=next(_versions))
+        return _merged_state['output'], _merged_state['version']
+
+
+def _cached_view(key, version, build):
+    """按版本缓存由巴菲特指标数据生成的结果，数据更新后重新生成，同一结果的并发请求只生成一次"""
+    cache_key = f"{VIEW_KEY_PREFIX}{version}:{key}"
+    result = cache.get(cache_key)
+    if result is not None:
+        return result
+
+    def build_and_cache():
+        result = cache.get(cache_key, record_stats=False)
+        if result is None:
+            result = build()
+            cache.set(cache_key, result, ttl=CACHE_TTL)
+        return result
+
+    result, _ = single_flight.do(cache_key, build_and_cache)
+    return result
+
+
+# @cached(ttl=CACHE_TTL, serializer=JsonSerializer())
+def merge_buffett_indicator():
+    """合并所有数据集并计算巴菲特指标"""
+    frame, version = get_buffett_frame()
+
+    def build():
+        # 将日期格式统一为 yyyy-mm-dd，不修改共享的数据
+        df = frame.copy(deep=False)
+        df['日期'] = df['日期'].dt.strftime('%Y-%m-%d')
+        return to_records(df)
+
+    return _cached_view("records", version, build)
+
+# 动态推算缺失的巴菲特指标
+def calculate_missing_buffett_index(merged_data, stock_data, buffett_latest_date):
+    """
+    巴菲特指标数据晚于指数行情更新时，按上证指数每日的涨跌幅推算最新巴菲特数据之后
+    每个交易日的总市值和巴菲特指标：每一天在前一天的基础上乘以 (1 + 当日涨跌幅)。
+    """
+    last_known_row = merged_data[merged_data['日期'] == buffett_latest_date].iloc[0]
+
+    # 最新巴菲特数据之后的所有交易日
+    stock_rows = stock_data[stock_data['date'] > buffett_latest_date].drop_duplicates('date').sort_values('date')
+    if not stock_rows.empty:
+        close = stock_rows['close'].to_numpy(dtype='float64')
+        previous_close = np.concatenate([[last_known_row['close']], close[:-1]])
+        growth = 1 + (close - previous_close) / previous_close
+
+        def extrapolate(base):
+            # 依次累乘，与逐日推算的结果一致
+            return np.multiply.accumulate(np.concatenate([[base], growth]))[1:]
+
+        new_rows = pd.DataFrame({
+            '日期': stock_rows['date'].to_numpy(),
+            '收盘价': close,
+            '总市值': extrapolate(last_known_row['总市值']),
             'GDP': last_known_row['GDP'],
-            '经典巴菲特指标': last_known_row['经典巴菲特指标'] * (1 + index_change_ratio),
-            '优化巴菲特指标': last_known_row['优化巴菲特指标'] * (1 + index_change_ratio),
-            'open': stock_row['open'].values[0],
-            'high': stock_row['high'].values[0],
-            'low': stock_row['low'].values[0],
-            'close': stock_row['close'].values[0],
-            'volume': stock_row['volume'].values[0]
-        }
-
-        merged_data = pd.concat([merged_data, pd.DataFrame([new_row])], ignore_index=True)
-        last_known_row = new_row
+            '经典巴菲特指标': extrapolate(last_known_row['经典巴菲特指标']),
+            '优化巴菲特指标': extrapolate(last_known_row['优化巴菲特指标']),
+            'open': stock_rows['open'].to_numpy(),
+            'high': stock_rows['high'].to_numpy(),
+            'low': stock_rows['low'].to_numpy(),
+            'close': close,
+            'volume': stock_rows['volume'].to_numpy(),
+        })
+        merged_data = pd.concat([merged_data, new_rows], ignore_index=True)
 
     merged_data = merged_data.sort_values(by='日期').reset_index(drop=True)
     return merged_data
@@ -159,10 +307,10 @@ def calculate_optimized_buffett_index(row):
 
     buffett_index = market_cap / gdp
 
-    alpha = 0.2
-    beta = 0.15
-    gamma = 0.1
-    delta = 0.1
+    alpha = PE_WEIGHT
+    beta = INTEREST_WEIGHT
+    gamma = LEVERAGE_WEIGHT
+    delta = INFLATION_WEIGHT
 
     pe_adjustment = 1 + alpha * (pe_ratio / BASE_PE_RATIO)
     interest_adjustment = 1 - beta * (interest_rate / BASE_INTEREST_RATE)
@@ -173,44 +321,107 @@ def calculate_optimized_buffett_index(row):
     return round(optimized_buffett_index, 3)
 
 
-def periodic_buffett_index(period=5):
+# 按列计算优化后的巴菲特指标
+def calculate_optimized_buffett_indices(data):
     """
-    根据指定的周期对上证指数和巴菲特指标进行汇总处理。
-    :param data: merge_buffett_indicator 输出的 DataFrame 数据
-    :param period: 周期天数 (int)，大于 0
-    :return: 一个包含周期数据的 DataFrame
-    """
-    data = pd.DataFrame(merge_buffett_indicator())
-    
-    data = data.sort_values(by='日期').reset_index(drop=True)
-
-    # 计算最大整数倍
-    total_rows = len(data)
-    max_multiple = total_rows // period
-    effective_rows = max_multiple * period
-
-    # 截取后 effective_rows 条数据
-    data = data.tail(effective_rows)
-
-    # 创建周期索引
-    data['周期'] = data.index // period
-
-    # 定义聚合方法
-    agg_funcs = {
-        '日期': 'last',  # 日期取周期最后一天的日期
-        'open': 'first',  # 开盘价取周期第一天的值
-        'high': 'max',    # 最高价取周期内的最大值
-        'low': 'min',     # 最低价取周期内的最小值
-        'close': 'last',  # 收盘价取周期最后一天的值
-        'volume': 'sum',  # 成交量取周期内的总和
-        '经典巴菲特指标': 'mean',  # 经典巴菲特指标取周期内的平均值
-        '优化巴菲特指标': 'mean'   # 优化巴菲特指标取周期内的平均值
-    }
+    对整张表按列计算优化后的巴菲特指标，运算顺序和取整方式与逐行计算的
+    calculate_optimized_buffett_index 相同，结果完全一致。
+    :param data: 包含 总市值、GDP、平均市盈率、LPR1Y、政府部门、今值 列的 DataFrame
+    :return: 与 data 索引对齐的 Series
+    """
+    def column(name):
+        return data[name].to_numpy(dtype='float64')
+
+    interest_rate = column('LPR1Y') / 100  # 转换为小数形式
+    leverage_ratio = column('政府部门') / 100  # 转换为小数形式
+    inflation_rate = column('今值') / 100  # 转换为小数形式
+
+    buffett_index = column('总市值') / column('GDP')
+
+    pe_adjustment = 1 + PE_WEIGHT * (column('平均市盈率') / BASE_PE_RATIO)
+    interest_adjustment = 1 - INTEREST_WEIGHT * (interest_rate / BASE_INTEREST_RATE)
+    leverage_adjustment = 1 + LEVERAGE_WEIGHT * (leverage_ratio / BASE_LEVERAGE_RATE)
+    inflation_adjustment = 1 + INFLATION_WEIGHT * (inflation_rate / BASE_CPI)
+
+    optimized_buffett_index = buffett_index * pe_adjustment * interest_adjustment * leverage_adjustment * inflation_adjustment
+    return pd.Series(round_as_builtin(optimized_buffett_index, 3), index=data.index)
 
-    # 按周期索引聚合
-    periodic_data = data.groupby('周期').agg(agg_funcs).reset_index(drop=True)
+
+def round_as_builtin(values, ndigits):
+    """
+    按 Python 内置 round 的规则对数组取整。numpy.round 先乘以 10 的幂再取整，
+    乘法的舍入误差可能让恰好落在 .5 附近的值进位方向不同，这些值改用内置 round 计算。
+    """
+    values = np.asarray(values, dtype='float64')
+    rounded = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    ambiguous = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in ambiguous:
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
+
+
+# 按周期汇总时各列的聚合方法
+RESAMPLE_AGGREGATIONS = {
+    '日期': 'last',  # 日期取周期最后一天的日期
+    'open': 'first',  # 开盘价取周期第一天的值
+    'high': 'max',    # 最高价取周期内的最大值
+    'low': 'min',     # 最低价取周期内的最小值
+    'close': 'last',  # 收盘价取周期最后一天的值
+    'volume': 'sum',  # 成交量取周期内的总和
+    '经典巴菲特指标': 'mean',  # 经典巴菲特指标取周期内的平均值
+    '优化巴菲特指标': 'mean'   # 优化巴菲特指标取周期内的平均值
+}
+
+# 支持的自然周期：周、月、季度
+RESAMPLE_RULES = ("W", "M", "Q")
+
+
+def validate_resample(period=5, rule=None):
+    """检查汇总周期参数，不合法时抛出 ValueError"""
+    if rule is not None:
+        if rule not in RESAMPLE_RULES:
+            raise ValueError(f"不支持的周期: {rule}，可选值为 {', '.join(RESAMPLE_RULES)}")
+    elif period is None or period <= 0:
+        raise ValueError("周期天数必须大于 0")
+
+
+def resample_buffett_frame(frame, period=5, rule=None):
+    """
+    对巴菲特指标数据按周期汇总，计算每个周期的 OHLCV 和巴菲特指标均值。
+    :param frame: get_buffett_frame 返回的数据
+    :param period: 每个周期包含的交易日数 (int)，大于 0；只保留最近的整数个周期
+    :param rule: 按自然周期汇总，W（周）、M（月）或 Q（季度），设置后忽略 period
+    :return: 字典列表
+    """
+    validate_resample(period, rule)
+    if rule is not None:
+        data = frame
+        groups = frame['日期'].dt.to_period(rule)
+    else:
+        # 截取最近的整数倍条数据，按从前往后的顺序每 period 条分为一组
+        effective_rows = len(frame) // period * period
+        data = frame.iloc[len(frame) - effective_rows:]
+        groups = np.arange(effective_rows) // period
+
+    # 按周期聚合
+    periodic_data = data.groupby(groups, sort=True).agg(RESAMPLE_AGGREGATIONS).reset_index(drop=True)
     # 保留巴菲特指标值的精度为 3 位小数
     periodic_data['经典巴菲特指标'] = periodic_data['经典巴菲特指标'].round(3)
     periodic_data['优化巴菲特指标'] = periodic_data['优化巴菲特指标'].round(3)
-    # 返回结果
-    return periodic_data.to_dict(orient='records')
\ No newline at end of file
+    periodic_data['日期'] = periodic_data['日期'].dt.strftime('%Y-%m-%d')
+    return to_records(periodic_data)
+
+
+def periodic_buffett_index(period=5, rule=None):
+    """
+    根据指定的周期对上证指数和巴菲特指标进行汇总处理，结果按周期缓存，数据更新后重新计算。
+    :param period: 周期天数 (int)，大于 0
+    :param rule: 按自然周期汇总，W（周）、M（月）或 Q（季度），设置后忽略 period
+    :return: 一个包含周期数据的字典列表
+    """
+    # 先检查参数，参数不合法时不请求数据
+    validate_resample(period, rule)
+    frame, version = get_buffett_frame()
+    key = ("rule", rule) if rule is not None else ("rows", period)
+    return _cached_view(key, version, lambda: resample_buffett_frame(frame, period, rule))
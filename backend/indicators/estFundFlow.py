@@ -1,10 +1,17 @@
 import akshare as ak
 import pandas as pd
 from functools import reduce
-from config.cached_akshare_request import cached_akshare_request
+from concurrent.futures import ThreadPoolExecutor
+from config.cached_akshare_request import cached_akshare_request, limit_ttl
+from config.ttlPolicy import intraday
 from indicators.common import repair_dataframe_data
 
-@cached_akshare_request
+SECTOR_INDICATORS = ["今日", "5日", "10日"]  # 板块资金流的三个统计周期
+
+# 并发获取不同周期板块资金流的线程池
+_sector_executor = ThreadPoolExecutor(max_workers=len(SECTOR_INDICATORS) * 2, thread_name_prefix="sector")
+
+@cached_akshare_request(ttl=intraday(300))
 def getSectionFundFlow(indicator="今日", sector_type="行业资金流"):
     """
     获取板块资金流排名数据
@@ -64,6 +71,50 @@ def getSectorFundFlowHist(symbol="电源设备"):
         print(f"获取数据出错: {e}")
         return None
     
+def fetch_sector_fund_flows(sector_type="行业资金流"):
+    """
+    并发获取 "今日"、"5日" 和 "10日" 三个周期的板块资金流数据。
+
+    返回:
+        dict: 周期 -> DataFrame，获取失败的周期为 None。
+    """
+    futures = {
+        indicator: _sector_executor.submit(getSectionFundFlow, indicator=indicator, sector_type=sector_type)
+        for indicator in SECTOR_INDICATORS
+    }
+    return {indicator: future.result() for indicator, future in futures.items()}
+
+
+def merge_sector_fund_flows(dfs):
+    """根据 '名称' 列合并各周期的板块资金流数据，缺失的周期跳过"""
+    merged_df = dfs["今日"]
+    if dfs["5日"] is not None:
+        merged_df = merged_df.merge(dfs["5日"], on='名称', how='inner')
+    if dfs["10日"] is not None:
+        merged_df = merged_df.merge(dfs["10日"], on='名称', how='inner')
+    return merged_df
+
+
+@cached_akshare_request(ttl=intraday(300))
+def load_sector_fund_flow_tables(sector_type="行业资金流"):
+    """
+    获取三个周期的板块资金流并合并，每个 sector_type 只合并一次，
+    calculate_top_bottom_five、calculate_sector_all 和 calculate_rt_top_bottom_five 共用。
+    合并结果的缓存有效期不超过各周期数据剩余的有效期，不会比 getSectionFundFlow 的数据更旧。
+
+    返回:
+        dict: 包含 "今日"、"5日"、"10日" 三个周期的 DataFrame 以及合并后的 "merged"。
+    """
+    dfs = fetch_sector_fund_flows(sector_type)
+    missing = [indicator for indicator, df in dfs.items() if df is None]
+    if missing:
+        # 不完整的数据不进入缓存，由调用方按需处理
+        raise ValueError(f"获取 {'、'.join(missing)} 数据失败")
+    remaining = [getSectionFundFlow.remaining_ttl(indicator, sector_type) for indicator in SECTOR_INDICATORS]
+    limit_ttl(min((seconds for seconds in remaining if seconds is not None), default=0))
+    return dict(dfs, merged=merge_sector_fund_flows(dfs))
+
+
 def load_sector_fund_flow_history(sector_type="行业资金流",symbol=""):
     if sector_type == "行业资金流":
         return getSectorFundFlowHist(symbol)
@@ -107,20 +158,12 @@ def calculate_top_bottom_five(sector_type="行业资金流"):
         tuple: 包含前5名和后5名行业数据的两个 DataFrame。
     """
     try:
-        indicators = ["今日", "5日", "10日"]
-        dfs = {}
-
-        # 获取不同时间指标的数据并重命名列
-        for indicator in indicators:
-            df = getSectionFundFlow(indicator=indicator, sector_type=sector_type)
-            if df is not None:
-                dfs[indicator] = df
-            else:
-                print(f"获取 {indicator} 数据失败")
-                return None, None
-
-        # 根据 '名称' 列进行合并
-        merged_df = dfs["今日"].merge(dfs["5日"], on='名称', how='inner').merge(dfs["10日"], on='名称', how='inner')
+        # 并发获取不同时间指标的数据，并使用按 '名称' 列合并好的数据
+        try:
+            merged_df = load_sector_fund_flow_tables(sector_type)["merged"]
+        except ValueError as e:
+            print(e)
+            return None, None
 
         # 确定用于评分的列名
         main_net_inflow_cols = {
@@ -139,7 +182,7 @@ def calculate_top_bottom_five(sector_type="行业资金流"):
         weights = {"今日": 0.8, "5日": 0.1, "10日": 0.1}
         merged_df['score'] = sum(
             weights[indicator] * merged_df[main_net_inflow_cols[indicator]]
-            for indicator in indicators
+            for indicator in SECTOR_INDICATORS
         )
 
         # 调用 normalize_scores 函数对评分进行归一化
@@ -173,7 +216,11 @@ def calculate_rt_top_bottom_five(sector_type="行业资金流"):
         tuple: 包含前5名和后5名行业数据的两个 DataFrame。
     """
     try:
-        df = getSectionFundFlow(indicator="今日", sector_type=sector_type)
+        try:
+            df = load_sector_fund_flow_tables(sector_type)["今日"]
+        except ValueError:
+            # 部分周期获取失败时，只使用今日数据
+            df = getSectionFundFlow(indicator="今日", sector_type=sector_type)
         # 使用归一化后的评分来排序
         df = df.sort_values(by='今日主力净流入-净额', ascending=False)
         total_amount = round(df['今日主力净流入-净额'].sum()/1e8,2)
@@ -203,20 +250,11 @@ def calculate_sector_all(sector_type="行业资金流"):
         tuple: 包含前5名和后5名行业数据的两个 DataFrame。
     """
     try:
-        indicators = ["今日", "5日", "10日"]
-        dfs = {}
-
-        # 获取不同时间指标的数据并重命名列
-        for indicator in indicators:
-            df = getSectionFundFlow(indicator=indicator, sector_type=sector_type)
-            dfs[indicator] = df
-
-        merged_df = dfs["今日"]
-        # 根据 '名称' 列进行合并
-        if dfs["5日"] is not None:
-            merged_df = merged_df.merge(dfs["5日"], on='名称', how='inner')
-        if dfs["10日"] is not None:
-            merged_df = merged_df.merge(dfs["10日"], on='名称', how='inner')
+        try:
+            merged_df = load_sector_fund_flow_tables(sector_type)["merged"]
+        except ValueError:
+            # 部分周期获取失败时，使用已获取到的周期进行合并
+            merged_df = merge_sector_fund_flows(fetch_sector_fund_flows(sector_type))
 
         merged_df = repair_dataframe_data(merged_df)
         return {
@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from config.cached_akshare_request import cached_akshare_request
 from indicators.common import repair_dataframe_data
+from indicators.akCommon import getSpotSnapshot
 
 
 # 设置阈值
@@ -166,6 +167,6 @@ def get_today_area_head_stocks(sector_type, symbol):
     }
 
 def get_market_total_amount():
-    df = ak.stock_zh_a_spot_em()
+    df = getSpotSnapshot()
     total_amount = df['成交额'].sum()/1e8
     return round(total_amount,2)
\ No newline at end of file
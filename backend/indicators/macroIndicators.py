@@ -1,41 +1,281 @@
 import re
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
 import pendulum
-from collections import defaultdict
-import requests
 import json
-from config.GlobalConfig import AKTOOLS_BASE_URL
+from config.AkToolsClient import aktools_client
 from config.cached_akshare_request import cached_akshare_request
+from config.IndicatorStore import indicator_store
+from config.SingleFlight import single_flight
 import os
 
 
 # 定义全局配置字典
 INDICATORS = {}
 
+# 编译后的指标配置：指标 -> {"config": 配置, "config_key": 配置摘要, "parse_dates": 日期格式化函数}
+COMPILED_INDICATORS = {}
+
+# 指标配置文件路径及上次加载时的修改时间，文件修改后自动重新加载
+INDICATORS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'indicators.json')
+_indicators_mtime = None
+_indicators_lock = threading.Lock()
+
+# 保存的处理结果格式版本，处理逻辑变化时递增，使已保存的结果失效
+STORE_VERSION = 1
+
+# 每个指标最多记住的日期格式化结果数量
+DATE_MEMO_SIZE = 100000
+
+
+def validate_indicator(config) -> list:
+    """检查指标配置，返回错误信息列表，配置有效时返回空列表"""
+    if not isinstance(config, dict):
+        return ["配置必须是对象"]
+    errors = []
+    x_field = config.get('xField')
+    if not isinstance(x_field, str) or not x_field.strip():
+        errors.append("xField 必须是非空字符串")
+    y_fields = config.get('yFields')
+    if (not isinstance(y_fields, list) or not y_fields
+            or not all(isinstance(y_field, str) and y_field.strip() for y_field in y_fields)):
+        errors.append("yFields 必须是非空的字符串列表")
+    time_format = config.get('timeFormat')
+    if not isinstance(time_format, str) or not time_format.strip():
+        errors.append("timeFormat 必须是非空字符串")
+    else:
+        try:
+            pendulum.datetime(2000, 1, 1).format(time_format)
+        except Exception as e:
+            errors.append(f"timeFormat 无效: {e}")
+    if config.get('aggregation', 'sum') not in AGGREGATIONS:
+        errors.append(f"aggregation 必须是 {', '.join(AGGREGATIONS)} 之一")
+    return errors
+
+
+def compile_date_parser(date_format: str):
+    """
+    生成指标专用的日期格式化函数，记住已经格式化过的原始日期，
+    同一指标之后的请求只需要处理新出现的日期。
+    """
+    memo = {}
+    lock = threading.Lock()
+
+    def parse(raw_values) -> dict:
+        raw_values = set(raw_values)
+        with lock:
+            result = {value: memo[value] for value in raw_values if value in memo}
+        missing = [value for value in raw_values if value not in result]
+        if missing:
+            formatted = format_dates(missing, date_format)
+            result.update(formatted)
+            with lock:
+                if len(memo) + len(formatted) > DATE_MEMO_SIZE:
+                    memo.clear()
+                memo.update(formatted)
+        return result
+
+    return parse
+
+
+def compile_indicator(config: dict) -> dict:
+    """预先生成指标的配置摘要和日期格式化函数"""
+    return {
+        "config": config,
+        "config_key": _config_key(config),
+        "parse_dates": compile_date_parser(config['timeFormat']),
+    }
+
+
 # 加载 JSON 配置文件
 def load_indicators():
-    global INDICATORS
-    # 获取当前文件的绝对路径
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # 构建 config 文件的绝对路径
-    config_path = os.path.join(current_dir, '..', 'config', 'indicators.json')
-    
-    with open(config_path, 'r', encoding='utf-8') as json_file:
-        INDICATORS = json.load(json_file)
+    """
+    读取并校验 indicators.json，配置无效的指标会被跳过。
+    重新加载时文件无法解析则继续使用已加载的配置，配置未变化的指标沿用已编译的结果。
+    """
+    global INDICATORS, COMPILED_INDICATORS, _indicators_mtime
+    with _indicators_lock:
+        mtime = os.stat(INDICATORS_PATH).st_mtime_ns
+        try:
+            with open(INDICATORS_PATH, 'r', encoding='utf-8') as json_file:
+                loaded = json.load(json_file)
+            if not isinstance(loaded, dict):
+                raise ValueError("配置文件的顶层必须是对象")
+        except (OSError, ValueError) as e:
+            if _indicators_mtime is None:
+                raise
+            print(f"重新加载指标配置失败，继续使用原有配置: {e}")
+            _indicators_mtime = mtime
+            return
+
+        valid, compiled = {}, {}
+        for key, config in loaded.items():
+            errors = validate_indicator(config)
+            if errors:
+                print(f"指标配置无效，已跳过: {key}: {'；'.join(errors)}")
+                continue
+            valid[key] = config
+            previous = COMPILED_INDICATORS.get(key)
+            compiled[key] = previous if previous and previous['config'] == config else compile_indicator(config)
+        INDICATORS, COMPILED_INDICATORS, _indicators_mtime = valid, compiled, mtime
+        print(f"加载指标配置: {len(valid)} 个")
+
+
+def refresh_indicators():
+    """indicators.json 修改后重新加载，无需重启后端"""
+    try:
+        mtime = os.stat(INDICATORS_PATH).st_mtime_ns
+    except OSError as e:
+        print(f"读取指标配置文件失败: {e}")
+        return
+    if mtime != _indicators_mtime:
+        load_indicators()
+
+
+def get_indicator(indicator: str):
+    """返回编译后的指标配置，指标不存在或配置无效时返回 None"""
+    refresh_indicators()
+    return COMPILED_INDICATORS.get(indicator)
+
+
+def list_enabled_indicators():
+    """返回所有启用的指标键，按配置中的 order 字段排序"""
+    refresh_indicators()
+    enabled = [(key, config) for key, config in INDICATORS.items() if config.get('enable')]
+    enabled.sort(key=lambda item: item[1].get('order', 0))
+    return [key for key, _ in enabled]
 
 
 # 通用方法：从缓存获取数据，若不存在则调用 AkTools API
 # @cached(ttl=CACHE_TTL, serializer=JsonSerializer())
 def get_data_from_cache_or_api(indicator: str):
 
+    # 未知的指标在请求 AkTools 之前直接报错
+    if get_indicator(indicator) is None:
+        raise ValueError(f"未知的指标: {indicator}")
+
     result = []
-    api_url = f"{AKTOOLS_BASE_URL}/{indicator}"
-    aktools_response = requests.get(api_url, timeout=180)
-    aktools_response.raise_for_status()
-    data = aktools_response.json()
+    # 通过连接池请求 AkTools，响应按指标缓存
+    data = aktools_client.get(indicator)
     if data:
-        result = process_indicator_data(INDICATORS[indicator], data)
+        # 同一指标的并发请求只处理一次
+        result, _ = single_flight.do(f"indicator-store:{indicator}", get_processed_indicator, indicator, data)
     return result
 
+
+def _digest(texts) -> str:
+    """计算一组文本的摘要"""
+    return hashlib.blake2b('\n'.join(texts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _config_key(indicator: dict) -> str:
+    """影响处理结果的配置项摘要，配置变化后已保存的处理结果失效"""
+    fields = [STORE_VERSION, indicator['xField'], indicator['yFields'], indicator['timeFormat'],
+              indicator.get('aggregation', 'sum')]
+    return _digest([json.dumps(fields, ensure_ascii=False)])
+
+
+def get_processed_indicator(indicator: str, data: list) -> dict:
+    """
+    返回指标处理后的 ECharts 数据，处理结果按指标保存在 indicator_store 中：
+    原始数据与上次相同时直接返回保存的结果；只在末尾追加或修改了数据时，
+    只处理最后一个已知 x 值及之后的记录；其余情况重新处理全部数据。
+    """
+    compiled = get_indicator(indicator)
+    if compiled is None:
+        raise ValueError(f"未知的指标: {indicator}")
+    config, config_key, parse_dates = compiled['config'], compiled['config_key'], compiled['parse_dates']
+    record, raw = indicator_store.get(indicator)
+    if record is not None and record['config'] != config_key:
+        record = None
+
+    # AkTools 客户端缓存有效期内返回的是同一个对象，不需要再计算摘要
+    if record is not None and raw is data:
+        indicator_store.record("unchanged")
+        return record['payload']
+
+    # 每条原始记录只序列化一次，用于计算全部数据和早于最新日期部分的摘要
+    texts = [repr(item) for item in data]
+    raw_hash = _digest(texts)
+    if record is not None and record['raw_hash'] == raw_hash:
+        indicator_store.put(indicator, record, data, persist=False)
+        indicator_store.record("unchanged")
+        return record['payload']
+
+    updated = _process_incremental(config, parse_dates, data, texts, record) if record is not None else None
+    if updated is not None:
+        indicator_store.record("incremental")
+    else:
+        dates = parse_dates(item[config['xField']] for item in data if config['xField'] in item)
+        updated = _build_record(config, data, texts, dates, process_indicator_data(config, data, dates))
+        indicator_store.record("rebuilt")
+    updated.update(config=config_key, raw_hash=raw_hash)
+    indicator_store.put(indicator, updated, data)
+    return updated['payload']
+
+
+def _build_record(config: dict, data: list, texts: list, dates: dict, payload: dict) -> dict:
+    """
+    生成保存到 indicator_store 的记录：
+    last_key 为最新日期的排序键，prefix_hash 为早于该日期的原始记录的摘要，
+    head_count 为 xData 中早于该日期的数量，dates 为原始日期的格式化结果。
+    """
+    x_field, date_format = config['xField'], config['timeFormat']
+    formatted = [dates[item[x_field]] for item in data]
+    keys = date_sort_keys(formatted + payload['xData'], date_format)
+    last_key = max(keys[x] for x in formatted)
+    head = [text for text, x in zip(texts, formatted) if keys[x] < last_key]
+    return {
+        "dates": {item[x_field]: x for item, x in zip(data, formatted)},
+        "last_key": last_key,
+        "prefix_hash": _digest(head),
+        "head_count": sum(keys[x] < last_key for x in payload['xData']),
+        "payload": payload,
+    }
+
+
+def _process_incremental(config: dict, parse_dates, data: list, texts: list, record: dict):
+    """
+    早于上次最新日期的原始记录没有变化时，只处理该日期及之后的记录，
+    并与保存的结果拼接。无法增量处理时返回 None。
+    """
+    x_field, date_format = config['xField'], config['timeFormat']
+    if any(x_field not in item for item in data):
+        return None
+    try:
+        # 只格式化新出现的日期
+        dates = dict(record['dates'])
+        dates.update(parse_dates(item[x_field] for item in data if item[x_field] not in dates))
+        keys = date_sort_keys(dates.values(), date_format)
+    except (TypeError, ValueError):
+        # 交给完整处理抛出原有的异常
+        return None
+
+    last_key = record['last_key']
+    head, tail = [], []
+    for item, text in zip(data, texts):
+        if keys[dates[item[x_field]]] < last_key:
+            head.append(text)
+        else:
+            tail.append(item)
+    if _digest(head) != record['prefix_hash']:
+        return None
+
+    # 保存的结果中早于 last_key 的部分只依赖未变化的记录，直接与新处理的部分拼接
+    stored, count = record['payload'], record['head_count']
+    added = process_indicator_data(config, tail, dates)
+    payload = {
+        "xData": stored['xData'][:count] + added['xData'],
+        "series": [
+            dict(old, data=old['data'][:count] + new['data'])
+            for old, new in zip(stored['series'], added['series'])
+        ],
+    }
+    return _build_record(config, data, texts, dates, payload)
+
+
 def add_date_separators(date_string):
     if date_string.isdigit():
         if len(date_string) == 6:  # 处理 YYYYMM 形式
@@ -45,10 +285,10 @@ def add_date_separators(date_string):
     return date_string
 
 
-def process_indicator_data(indicator, data):
-    sdl = process_time_format(data, indicator['xField'], indicator['timeFormat'])
+def process_indicator_data(indicator, data, dates=None):
+    sdl = process_time_format(data, indicator['xField'], indicator['timeFormat'], dates)
 
-    return aggregate_data(sdl, indicator['xField'], indicator['yFields'])
+    return aggregate_data(sdl, indicator['xField'], indicator['yFields'], indicator.get('aggregation', 'sum'))
 
 
 def smart_date_parser(date_string, output_format):
@@ -71,40 +311,143 @@ def smart_date_parser(date_string, output_format):
     return fd
 
 
-def process_time_format(data: list, time_key: str, date_format: str) -> list:
+# pendulum 日期格式与 strftime 格式的对应关系，这些格式可以直接用 pandas 批量解析和格式化
+STRFTIME_FORMATS = {"YYYY": "%Y", "YYYY-MM": "%Y-%m", "YYYY-MM-DD": "%Y-%m-%d"}
+
+# AkTools 返回的常见日期形式：2024-01-02T00:00:00.000、2024-01、20240102、202401、2024年01月份，
+# 这些形式经过 smart_date_parser 清洗后都是 YYYY-MM(-DD)，可以直接取出年月日批量解析
+COMMON_DATE_PATTERN = (r'^(?P<year>[1-9][0-9]{3})(?:'
+                       r'-(?P<month>[0-9]{2})(?:-(?P<day>[0-9]{2}))?(?:[ T.].*)?'
+                       r'|(?P<month2>[0-9]{2})(?P<day2>[0-9]{2})?'
+                       r'|年(?P<month3>[0-9]{2})月份?)$')
+
+
+def parse_common_dates(values: pd.Series) -> pd.Series:
+    """批量解析常见形式的日期字符串，其余形式返回 NaT"""
+    parts = values.str.extract(COMMON_DATE_PATTERN)
+    month = parts['month'].where(parts['month'].notna(), parts['month2'])
+    month = month.where(month.notna(), parts['month3'])
+    day = parts['day'].where(parts['day'].notna(), parts['day2'])
+    # 只有年月的日期按当月 1 日处理，与 pendulum.parse 一致
+    return pd.to_datetime(parts['year'] + '-' + month + '-' + day.where(day.notna(), '01'), format='%Y-%m-%d', errors='coerce')
+
+
+def format_dates(raw_values, date_format: str) -> dict:
+    """
+    将原始日期值格式化为 date_format，结果与逐个调用 smart_date_parser 相同。
+    每个不同的原始值只处理一次，常见形式用 pandas 批量解析，其余的交给 smart_date_parser，
+    无法解析的值保持原样。
+
+    返回:
+        dict: 原始值 -> 格式化后的日期字符串
+    """
+    unique = set(raw_values)
+    formatted = {}
+    strftime_format = STRFTIME_FORMATS.get(date_format)
+    strings = [value for value in unique if isinstance(value, str)]
+    if strings and strftime_format:
+        raw = pd.Series(strings, dtype=object)
+        parsed = parse_common_dates(raw)
+        ok = parsed.notna()
+        formatted.update(zip(raw[ok], parsed[ok].dt.strftime(strftime_format)))
+
+    for value in unique:
+        if value in formatted:
+            continue
+        try:
+            formatted[value] = smart_date_parser(value, date_format)
+        except ValueError:
+            formatted[value] = value
+    return formatted
+
+
+def date_sort_keys(values, date_format: str) -> dict:
+    """计算格式化后日期的排序键（纳秒时间戳），先后顺序与 pendulum.parse 一致"""
+    unique = pd.Series(list(set(values)), dtype=object)
+    keys = {}
+    strftime_format = STRFTIME_FORMATS.get(date_format)
+    if strftime_format:
+        parsed = pd.to_datetime(unique, format=strftime_format, errors='coerce')
+        keys.update(zip(unique[parsed.notna()], parsed[parsed.notna()].astype('int64')))
+    for value in unique:
+        if value in keys:
+            continue
+        timestamp = pd.Timestamp(pendulum.parse(value))
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert(None)
+        keys[value] = timestamp.value
+    return keys
+
+
+def process_time_format(data: list, time_key: str, date_format: str, dates: dict = None) -> list:
+    # 复制每条记录后再格式化日期，避免修改缓存中的 AkTools 响应数据
+    data = [dict(item) for item in data]
+    raw_values = [item[time_key] for item in data if time_key in item]
+    # dates 为已格式化的日期（原始值 -> 格式化结果），需要包含 data 中的所有日期
+    formatted = dates if dates is not None else format_dates(raw_values, date_format)
     for item in data:
         if time_key in item:
-            try:
-                item[time_key] = smart_date_parser(item[time_key], date_format)
-            except ValueError:
-                pass
-    sorted_data = sorted(data, key=lambda x: pendulum.parse(x[time_key]))
-    return sorted_data
+            item[time_key] = formatted[item[time_key]]
 
+    # 按日期稳定排序，日期相同的记录保持原有顺序
+    keys = date_sort_keys([item[time_key] for item in data], date_format)
+    order = np.argsort(np.array([keys[item[time_key]] for item in data], dtype='int64'), kind='stable')
+    return [data[i] for i in order]
 
-def aggregate_data(data: list, x_field: str, y_fields: list) -> dict:
-    """对格式化后的数据进行聚合，生成适用于 ECharts 的数据格式"""
-    aggregated = defaultdict(lambda: defaultdict(float))
 
-    # 聚合数据
-    for item in data:
-        x_value = item[x_field]
-        if x_value is None:
-            continue
+# 同一个 x 值有多条记录时的聚合方式，在 indicators.json 中通过 aggregation 字段按指标配置，默认为 sum
+AGGREGATIONS = ("sum", "mean", "last")
+
+
+def aggregate_data(data: list, x_field: str, y_fields: list, aggregation: str = "sum") -> dict:
+    """
+    对格式化后的数据按 x_field 分组聚合，生成适用于 ECharts 的数据格式。
+    y 值只统计 int / float 类型的数据，没有任何数字 y 值的 x 不会出现在 xData 中。
+
+    aggregation:
+        sum: 求和，没有数据时为 0
+        mean: 求平均值，没有数据时为 None
+        last: 取最后一条记录的值，没有数据时为 None
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"不支持的聚合方式: {aggregation}")
+
+    # 按 x 值分组，codes 为每条记录所属分组的编号，x 为 None 的记录编号为 -1
+    codes, x_values = pd.factorize(pd.Series([item[x_field] for item in data], dtype=object))
+    groups = len(x_values)
+    # 每个分组第一条带有数字 y 值的记录位置，没有任何数字 y 值的 x 不会出现在结果中
+    first = np.full(groups, len(data))
 
-        # 累加 y_fields 中的值
-        for y_field in y_fields:
-            if y_field in item and isinstance(item[y_field], (int, float)):
-                aggregated[x_value][y_field] += item[y_field]
+    aggregated = {}
+    for y_field in y_fields:
+        column = [item.get(y_field) for item in data]
+        # 非数字的 y 值记为 NaN，NaN 按缺失处理
+        values = np.fromiter((value if isinstance(value, (int, float)) else np.nan for value in column),
+                             dtype='float64', count=len(column))
+        valid = ~np.isnan(values) & (codes >= 0)
+        positions = np.flatnonzero(valid)
+        group, values = codes[valid], values[valid]
+        np.minimum.at(first, group, positions)
 
-    # 准备 ECharts 格式的数据
-    x_data = list(aggregated.keys())
-    series_data = {y_field: [] for y_field in y_fields}
+        result = np.full(groups, None, dtype=object)
+        if aggregation == "last":
+            last = np.full(groups, -1)
+            np.maximum.at(last, group, np.arange(len(group)))
+            result[last >= 0] = values[last[last >= 0]]
+        else:
+            totals = np.bincount(group, weights=values, minlength=groups)
+            if aggregation == "sum":
+                result[:] = totals
+            else:
+                counts = np.bincount(group, minlength=groups)
+                result[counts > 0] = totals[counts > 0] / counts[counts > 0]
+        aggregated[y_field] = result
 
-    # 构建 ECharts 格式的 series 数据
-    for x_value in x_data:
-        for y_field in y_fields:
-            series_data[y_field].append(aggregated[x_value][y_field])
+    # xData 按 x 值第一次出现数字 y 值的顺序排列
+    order = np.argsort(first, kind='stable')
+    order = order[first[order] < len(data)]
+    x_data = x_values.take(order).tolist()
+    series_data = {y_field: aggregated[y_field][order].tolist() for y_field in y_fields}
 
     # 返回适合 ECharts 的数据格式
     return {
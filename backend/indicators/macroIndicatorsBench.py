@@ -0,0 +1,141 @@
+"""
+宏观指标处理的基准测试，与改动前的逐行实现比较：
+- dates：process_time_format（逐行 smart_date_parser + pendulum 排序 与 按唯一值向量化解析）
+- aggregate：aggregate_data（嵌套 defaultdict 逐项累加 与 按列分组聚合）
+两种实现的输出先比对一致，再计时。
+
+在 backend 目录下运行：python -m indicators.macroIndicatorsBench [dates|aggregate]
+"""
+import argparse
+import datetime
+import random
+import time
+from collections import defaultdict
+import pendulum
+from indicators import macroIndicators
+from indicators.macroIndicators import smart_date_parser
+
+DAILY_ROWS = 8000  # 日度指标的行数
+MONTHLY_ROWS = 420  # 其余指标的行数
+AGGREGATE_ROWS = 12000
+AGGREGATE_FIELDS = ["今值", "预测值", "前值"]
+RUNS = 20
+
+
+def legacy_process_time_format(data: list, time_key: str, date_format: str) -> list:
+    """改动前的 process_time_format：逐行解析日期，排序时再逐个解析"""
+    for item in data:
+        if time_key in item:
+            try:
+                item[time_key] = smart_date_parser(item[time_key], date_format)
+            except ValueError:
+                pass
+    return sorted(data, key=lambda x: pendulum.parse(x[time_key]))
+
+
+def legacy_aggregate_data(data: list, x_field: str, y_fields: list) -> dict:
+    """改动前的 aggregate_data：嵌套 defaultdict 逐项累加（相当于 aggregation="sum"）"""
+    aggregated = defaultdict(lambda: defaultdict(float))
+    for item in data:
+        x_value = item[x_field]
+        if x_value is None:
+            continue
+        for y_field in y_fields:
+            if y_field in item and isinstance(item[y_field], (int, float)):
+                aggregated[x_value][y_field] += item[y_field]
+    x_data = list(aggregated.keys())
+    return {
+        "xData": x_data,
+        "series": [
+            {
+                "name": y_field,
+                "type": "line",
+                "coordinateSystem": 'cartesian2d',
+                "data": [aggregated[x_value][y_field] for x_value in x_data]
+            }
+            for y_field in y_fields
+        ]
+    }
+
+
+def make_dated_rows(x_field, date_format, n, rng):
+    """按 AkTools 返回的日期形式生成乱序的指标数据"""
+    base = datetime.date(1990, 1, 1)
+    rows = []
+    for i in range(n):
+        day = base + datetime.timedelta(days=i if date_format == "YYYY-MM-DD" else 31 * i)
+        if x_field == "月份":
+            raw = f"{day.year}年{day.month:02d}月份"
+        elif date_format == "YYYY-MM-DD":
+            raw = day.isoformat() + "T00:00:00.000"
+        else:
+            raw = f"{day.year}-{day.month:02d}-01T00:00:00.000" if i % 2 else f"{day.year}{day.month:02d}"
+        rows.append({x_field: raw, "今值": rng.random(), "预测值": None})
+    rng.shuffle(rows)
+    return rows
+
+
+def make_aggregate_rows(n, rng):
+    """生成混合了数值、None、字符串和布尔值的数据，x 值有重复"""
+    rows = []
+    for i in range(n):
+        row = {"x": None if i % 97 == 0 else f"k{i // 3}"}
+        for field in AGGREGATE_FIELDS:
+            r = rng.random()
+            if r < .1:
+                row[field] = None
+            elif r < .15:
+                row[field] = "1.5"
+            elif r < .16:
+                row[field] = True
+            else:
+                row[field] = rng.randint(0, 9) if r < .3 else rng.random() * 100
+        rows.append(row)
+    return rows
+
+
+def bench_dates(rng):
+    macroIndicators.load_indicators()
+    legacy_total = new_total = 0
+    for name, config in macroIndicators.INDICATORS.items():
+        n = DAILY_ROWS if config["timeFormat"] == "YYYY-MM-DD" else MONTHLY_ROWS
+        data = make_dated_rows(config["xField"], config["timeFormat"], n, rng)
+        started = time.perf_counter()
+        expected = legacy_process_time_format([dict(item) for item in data], config["xField"], config["timeFormat"])
+        legacy_total += time.perf_counter() - started
+        started = time.perf_counter()
+        actual = macroIndicators.process_time_format(data, config["xField"], config["timeFormat"])
+        new_total += time.perf_counter() - started
+        assert actual == expected, name
+    print(f"process_time_format，{len(macroIndicators.INDICATORS)} 个指标："
+          f"旧 {legacy_total:.2f} s，新 {new_total:.2f} s（{legacy_total / new_total:.1f} 倍）")
+
+
+def bench_aggregate(rng, runs=RUNS):
+    data = make_aggregate_rows(AGGREGATE_ROWS, rng)
+    assert macroIndicators.aggregate_data(data, "x", AGGREGATE_FIELDS) == legacy_aggregate_data(data, "x", AGGREGATE_FIELDS)
+    cases = [("旧", lambda: legacy_aggregate_data(data, "x", AGGREGATE_FIELDS))]
+    cases += [(f"新 {aggregation}", lambda a=aggregation: macroIndicators.aggregate_data(data, "x", AGGREGATE_FIELDS, a))
+              for aggregation in macroIndicators.AGGREGATIONS]
+    print(f"aggregate_data，{AGGREGATE_ROWS} 行 x {len(AGGREGATE_FIELDS)} 列，平均 {runs} 次：")
+    for name, fn in cases:
+        started = time.perf_counter()
+        for _ in range(runs):
+            fn()
+        print(f"  {name:<8} {(time.perf_counter() - started) / runs * 1000:6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="宏观指标日期处理与聚合的耗时")
+    parser.add_argument("only", nargs="?", choices=["dates", "aggregate"], help="只运行其中一项")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    if args.only in (None, "dates"):
+        bench_dates(rng)
+    if args.only in (None, "aggregate"):
+        bench_aggregate(rng)
+
+
+if __name__ == "__main__":
+    main()
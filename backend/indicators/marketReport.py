@@ -4,12 +4,23 @@ import pandas as pd
 import akshare as ak
 import numpy as np
 from config.cached_akshare_request import cached_akshare_request
+from config.ttlPolicy import next_trading_day, intraday
+from indicators.akCommon import getSpotSnapshot
+from indicators.asofJoin import latest_as_of
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
 import random
 
-@cached_akshare_request
+REPORT_SOURCE_TIMEOUT = 60  # 单个数据源的最长等待时间（秒）
+REPORT_WORKERS = 9  # 并发获取报告数据的线程数
+
+# 报告数据获取专用线程池
+_report_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report")
+
+@cached_akshare_request(ttl=next_trading_day)
 def get_cpi_data():
     """
     获取中国 CPI 月率报告，返回最近一条非 NaN 的数据。
@@ -20,11 +31,8 @@ def get_cpi_data():
     # 获取中国 CPI 月率数据
     df = ak.macro_china_cpi_monthly()
     
-    # 筛选出今值不为 NaN 的记录
-    filtered_df = df[df['今值'].notna()]
-    
-    # 提取最近一条记录
-    lr = filtered_df.tail(1)
+    # 提取截至今天已公布（今值不为 NaN）的最近一条记录，排除已排期但未公布的数据
+    lr = latest_as_of(df, '日期', ['今值'])
     
     # 返回字典
     return {
@@ -32,29 +40,30 @@ def get_cpi_data():
     }
 
 # 获取 LPR 品种数据
-@cached_akshare_request
+@cached_akshare_request(ttl=next_trading_day)
 def get_lpr_data():
     lpr_data = ak.macro_china_lpr()
-    lr = lpr_data.tail(1)
+    # 截至今天一年期 LPR 不为空的最近一条记录
+    lr = latest_as_of(lpr_data, 'TRADE_DATE', ['LPR1Y'])
     return {
         "LPR":NP2Dict(lr)
     }
 
 # 获取宏观经济杠杆率
-@cached_akshare_request
+@cached_akshare_request(ttl=next_trading_day)
 def get_macro_leverage_data():
 
     # 获取宏观杠杆率数据
     macro_leverage_data = ak.macro_cnbs()
     
-    # 提取最近一条数据
-    lr = macro_leverage_data.tail(1)
+    # 提取截至今天政府部门杠杆率不为空的最近一条数据
+    lr = latest_as_of(macro_leverage_data, '年份', ['政府部门'])
     return {
         "宏观杠杆率":NP2Dict(lr)
     }
 
 # 获取上证实时行情
-@cached_akshare_request
+@cached_akshare_request(ttl=intraday(60))
 def get_stock_zh_real_time():
     stock_zh_index_spot_em_df = ak.stock_zh_index_spot_em(symbol="上证系列指数")
     filtered_df = stock_zh_index_spot_em_df[stock_zh_index_spot_em_df['代码'] == "000001"]
@@ -63,10 +72,10 @@ def get_stock_zh_real_time():
     }
 
 # 获取经典巴菲特指标
-@cached_akshare_request
+@cached_akshare_request(ttl=next_trading_day)
 def get_class_buffet_indice():
     buffett_data = ak.stock_buffett_index_lg()
-    lr = buffett_data.tail(1)
+    lr = latest_as_of(buffett_data, '日期', ['总市值', 'GDP'])
     return {
         "巴菲特指标": NP2Dict(lr)
     }
@@ -74,7 +83,7 @@ def get_class_buffet_indice():
 # 获取当日总成交额
 # @cached_akshare_request
 def get_market_total_amount():
-    df = ak.stock_zh_a_spot_em()
+    df = getSpotSnapshot()
     total_amount = df['成交额'].sum()
     return {
         "市场总成交金额":total_amount
@@ -91,8 +100,8 @@ def get_market_fund_flow():
         "市场资金流": NP2Dict(lr)
     }
 
-# 统计股票数据
-@cached_akshare_request
+# 统计股票数据（过期后 5 分钟内先返回旧统计并在后台刷新）
+@cached_akshare_request(ttl=intraday(300), stale_ttl=300)
 def fetch_stock_data():
     """
     统计股票涨跌幅的分布情况，并返回符合需求的字典格式。
@@ -100,11 +109,10 @@ def fetch_stock_data():
     Returns:
         dict: 各涨跌幅区间的统计及上涨、平盘、下跌家数。
     """
-    # 获取股票数据
-    stock_data = ak.stock_zh_a_spot_em()
+    # 获取股票数据（实时行情快照的数值列已转换为数值类型）
+    stock_data = getSpotSnapshot()
 
-    # 确保涨跌幅为浮点类型，并排除 NaN 数据
-    stock_data['涨跌幅'] = pd.to_numeric(stock_data['涨跌幅'], errors='coerce')
+    # 排除涨跌幅为 NaN 的数据
     stock_data = stock_data.dropna(subset=['涨跌幅'])
 
     # 自定义涨跌幅区间
@@ -143,7 +151,7 @@ def fetch_stock_data():
 
     return result
 
-@cached_akshare_request
+@cached_akshare_request(ttl=intraday(300))
 def get_section_fund_flow():
     """
     获取行业和概念板块资金流入的前五名和后五名，排除无效数据（主力净流入为空或 NaN），
@@ -196,16 +204,33 @@ def get_user_data_directory():
     else:
         return home / "ElonMarketData"  # 默认路径
 
-def fetch_all_data():
+def _timed_call(func):
+    """执行数据获取函数，返回 (结果, 异常, 耗时秒数)"""
+    started = time.time()
+    try:
+        return func(), None, time.time() - started
+    except Exception as e:
+        return None, e, time.time() - started
+
+
+def fetch_all_data(timeout=REPORT_SOURCE_TIMEOUT):
     """
     整合所有数据获取函数，返回一个包含所有键值对的单层大字典。
-    并将数据以 JSON 格式写入用户文档目录，文件名为 'market_data_报告日期.json'。
+    并将数据以 JSON 格式写入用户文档目录，文件名为 'market-data_报告日期.json'。
+
+    各数据源并发获取，每个数据源最多等待 timeout 秒。某个数据源失败或超时时，
+    仍会返回其余数据，但不写入文件，避免不完整的报告覆盖当天已有的完整报告。
     
     Returns:
-        dict: 包含多个数据来源的整合字典，所有键值对为平铺结构，值为基本数据类型。
+        tuple: (报告数据, 诊断信息)
+            报告数据为包含多个数据来源的整合字典，所有键值对为平铺结构，值为基本数据类型；
+            诊断信息不写入报告：{"数据源耗时": 函数名 -> 耗时秒数（超时为 None），
+                                  "数据源错误": 函数名 -> 失败或超时原因}。
     """
     try:
         all_data = {}
+        timings = {}
+        errors = {}
         functions = [
             get_cpi_data,
             get_lpr_data,
@@ -218,13 +243,35 @@ def fetch_all_data():
             get_section_fund_flow,
         ]
 
-        for func in functions:
-            result = {key:value for key, value in func().items()}
-            all_data.update(result)
+        started = time.time()
+        futures = [(func, _report_executor.submit(_timed_call, func)) for func in functions]
+
+        # 按原有顺序合并结果，保证相同键的覆盖顺序不变
+        for func, future in futures:
+            name = func.__name__
+            remaining = max(0, started + timeout - time.time())
+            try:
+                result, error, elapsed = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                errors[name] = f"超过 {timeout} 秒未返回"
+                timings[name] = None
+                continue
+            timings[name] = round(elapsed, 3)
+            if error is not None:
+                errors[name] = str(error)
+            else:
+                all_data.update({key: value for key, value in result.items()})
+
+        diagnostics = {"数据源耗时": timings, "数据源错误": errors}
 
         all_data.update({"投资名言":generate_investment_advice()})
         # 提取报告日期
-        report_date = all_data.get("报告日期", "unknown_date")
+        report_date = all_data.get("报告日期")
+
+        if errors or report_date is None:
+            # 部分数据源失败时不写入文件，保留当天已有的完整报告
+            print(f"报告数据不完整，不写入文件: {errors}")
+            return all_data, diagnostics
 
         # 动态获取用户文档目录
         user_data_directory = get_user_data_directory()
@@ -239,10 +286,10 @@ def fetch_all_data():
 
         print(f"数据已写入文件: {file_path}")
 
-        return all_data
+        return all_data, diagnostics
 
     except Exception as e:
-        return {"error": str(e)}
+        return {"error": str(e)}, {}
     
 def generate_investment_advice():
     investment_quotes = [
@@ -1,16 +1,15 @@
-import akshare as ak
 import pandas as pd
 import numpy as np
 from config.cached_akshare_request import cached_akshare_request
 from indicators.common import repair_dataframe_data,NP2Dict
+from indicators.akCommon import getSpotSnapshot
 
 def fetch_stock_data():
     """
     获取5000多只股票的最后一个交易日数据。
     :return: DataFrame 格式的股票数据
     """
-    stock_zh_a_spot_em_df = ak.stock_zh_a_spot_em()
-    stock_zh_a_spot_em_df = repair_dataframe_data(stock_zh_a_spot_em_df)
+    stock_zh_a_spot_em_df = repair_dataframe_data(getSpotSnapshot())
     return stock_zh_a_spot_em_df
 
 def analyze_stock_changes(stock_data):
@@ -115,14 +114,8 @@ def get_might_sideways_stocks(
     返回:
     - DataFrame: 涨跌幅在指定范围内且满足其他条件的股票数据，仅包含代码、名称和涨跌幅。
     """
-    # 获取 A 股最新行情
-    stock_zh_a_spot_em_df = ak.stock_zh_a_spot_em()
-
-    # 转换涨跌幅为浮点型（确保筛选操作有效）
-    stock_zh_a_spot_em_df["涨跌幅"] = pd.to_numeric(stock_zh_a_spot_em_df["涨跌幅"], errors="coerce")
-    stock_zh_a_spot_em_df["60日涨跌幅"] = pd.to_numeric(stock_zh_a_spot_em_df["60日涨跌幅"], errors="coerce")
-    stock_zh_a_spot_em_df["成交量"] = pd.to_numeric(stock_zh_a_spot_em_df["成交量"], errors="coerce")
-    stock_zh_a_spot_em_df["换手率"] = pd.to_numeric(stock_zh_a_spot_em_df["换手率"], errors="coerce")
+    # 获取 A 股最新行情（实时行情快照的数值列已转换为数值类型）
+    stock_zh_a_spot_em_df = getSpotSnapshot()
 
     # 筛选涨跌幅在指定范围内的股票
     filtered_stocks = stock_zh_a_spot_em_df[
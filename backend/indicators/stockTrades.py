@@ -1,10 +1,11 @@
 import pandas as pd
 from config.cached_akshare_request import cached_akshare_request
+from config.ttlPolicy import intraday
 import akshare as ak
 from indicators.akCommon import getStockCodeWithFlag
 from indicators.common import convert_value
 
-@cached_akshare_request
+@cached_akshare_request(ttl=intraday(60))
 def get_stock_minute_trades(symbol: str):
     """
     将秒级交易数据聚合到分钟级别，并计算总成交量、总成交额、总主动买入量、总主动买入额、总主动卖出量、总主动卖出额。
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import buffettIndicator
+from indicators.buffettIndicator import (
+    calculate_optimized_buffett_index, calculate_optimized_buffett_indices, round_as_builtin
+)
+
+
+def make_inputs(n=5000, seed=7):
+    """随机生成巴菲特指标的输入数据，包含缺失的 CPI 和恰好落在取整边界上的值"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        '日期': pd.date_range('2000-01-01', periods=n),
+        '总市值': rng.uniform(1e5, 1e6, n),
+        'GDP': rng.uniform(5e5, 1.3e6, n),
+        '平均市盈率': rng.uniform(8, 60, n),
+        'LPR1Y': rng.choice([3.1, 3.45, 3.65, 4.31, 4.35], n),
+        '政府部门': rng.uniform(30, 60, n),
+        '今值': rng.uniform(-1.5, 2.5, n),
+    })
+    # CPI 缺失的行
+    df.loc[::97, '今值'] = np.nan
+    # 其余因子为 0 时结果等于 总市值 / GDP，构造 x.xxx5 形式的取整边界值
+    df.loc[:200, '总市值'] = df.loc[:200, 'GDP'] * (np.arange(201) / 1000 + 0.0005)
+    df.loc[:200, ['平均市盈率', 'LPR1Y', '政府部门', '今值']] = 0.0
+    return df
+
+
+def test_vectorized_matches_row_wise():
+    df = make_inputs()
+    expected = df.apply(calculate_optimized_buffett_index, axis=1).to_numpy(dtype='float64')
+    actual = calculate_optimized_buffett_indices(df)
+    assert list(actual.index) == list(df.index)
+    assert np.isnan(expected).sum() == df['今值'].isna().sum()
+    assert np.array_equal(actual.to_numpy(), expected, equal_nan=True)
+
+
+def test_vectorized_matches_row_wise_on_non_default_index():
+    df = make_inputs(n=300, seed=3).iloc[::-1].set_index(pd.Index(np.arange(300) * 7))
+    expected = df.apply(calculate_optimized_buffett_index, axis=1)
+    actual = calculate_optimized_buffett_indices(df)
+    assert np.array_equal(actual.to_numpy(), expected.loc[actual.index].to_numpy(dtype='float64'), equal_nan=True)
+
+
+def test_round_as_builtin_on_half_boundaries():
+    values = np.concatenate([
+        np.arange(2001) / 1000 + 0.0005,         # x.xxx5
+        [2.675, 1.0005, 0.1235, -0.0005, -2.675, 0.0, np.nan],
+        np.random.default_rng(1).uniform(-5, 5, 2000),
+    ])
+    rounded = round_as_builtin(values, 3)
+    expected = np.array([round(float(v), 3) for v in values])
+    assert np.array_equal(rounded, expected, equal_nan=True)
+
+
+def make_sources(n_days, stock_extra=10, seed=5):
+    """生成巴菲特指标的各个数据源，指数行情比巴菲特数据多 stock_extra 个交易日"""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range('2010-01-04', periods=n_days)
+    buffett = pd.DataFrame({'日期': days, '收盘价': rng.uniform(2000, 4000, n_days).round(2),
+                            '总市值': rng.uniform(1e5, 1e6, n_days),
+                            'GDP': np.repeat(rng.uniform(5e5, 1e6, n_days // 250 + 1), 250)[:n_days],
+                            '近十年分位数': rng.uniform(0, 1, n_days)})
+    months = pd.date_range('2009-06-01', days[-1], freq='MS') + pd.Timedelta(days=9)
+    cpi = pd.DataFrame({'日期': months, '今值': rng.uniform(-1, 2, len(months)).round(1)})
+    lpr = pd.DataFrame({'TRADE_DATE': months - pd.Timedelta(days=5), 'LPR1Y': rng.choice([3.45, 3.65, 4.35], len(months))})
+    quarters = pd.date_range('2009-03-01', days[-1], freq='QS')
+    leverage = pd.DataFrame({'年份': quarters, '政府部门': rng.uniform(30, 60, len(quarters))})
+    pe = pd.DataFrame({'日期': days[::5], '平均市盈率': rng.uniform(10, 40, len(days[::5]))})
+    stock_days = pd.bdate_range(days[0], periods=n_days + stock_extra)
+    stock = pd.DataFrame({'date': stock_days, 'open': rng.uniform(2000, 4000, len(stock_days)),
+                          'close': rng.uniform(2000, 4000, len(stock_days)),
+                          'volume': rng.integers(1e6, 1e9, len(stock_days))})
+    stock['high'] = stock[['open', 'close']].max(axis=1)
+    stock['low'] = stock[['open', 'close']].min(axis=1)
+    return dict(buffett=buffett, cpi=cpi, lpr=lpr, leverage=leverage, pe=pe, stock=stock)
+
+
+def truncate(sources, last_date):
+    """只保留 last_date 及之前的数据，模拟较早时获取的数据源"""
+    return {name: frame[frame[buffettIndicator.SOURCE_DATE_COLUMNS[name]] <= last_date].reset_index(drop=True)
+            for name, frame in sources.items()}
+
+
+@pytest.fixture
+def buffett_state(monkeypatch):
+    """使用全新的物化状态，并记录重新合并全部数据的次数"""
+    def reset():
+        state = {key: None for key in buffettIndicator._merged_state}
+        state.update(version=0)
+        monkeypatch.setattr(buffettIndicator, "_merged_state", state)
+
+    rebuilds = []
+    rebuild = buffettIndicator._rebuild_merged_frame
+
+    def counting_rebuild(sources):
+        rebuilds.append(len(sources['buffett']))
+        return rebuild(sources)
+
+    monkeypatch.setattr(buffettIndicator, "_rebuild_merged_frame", counting_rebuild)
+    reset()
+    return reset, rebuilds
+
+
+def load(monkeypatch, sources):
+    monkeypatch.setattr(buffettIndicator, "load_buffett_sources", lambda: {k: v.copy() for k, v in sources.items()})
+    return buffettIndicator.merge_buffett_indicator()
+
+
+def full_rebuild(monkeypatch, reset, sources):
+    reset()
+    return load(monkeypatch, sources)
+
+
+def test_incremental_merge_matches_full_rebuild(monkeypatch, buffett_state):
+    reset, rebuilds = buffett_state
+    sources = make_sources(1500)
+    days = sources['buffett']['日期']
+
+    first = load(monkeypatch, truncate(sources, days.iloc[1480]))
+    assert rebuilds == [1481]
+    assert load(monkeypatch, truncate(sources, days.iloc[1480])) is first
+
+    # 只追加了新的交易日，增量合并；最后一次指数行情比巴菲特数据多 10 个交易日，需要推算
+    for snapshot in (truncate(sources, days.iloc[1490]), sources):
+        count = len(rebuilds)
+        incremental = load(monkeypatch, snapshot)
+        assert len(rebuilds) == count
+        # 与全新状态下重新合并全部数据的结果比较，之后恢复增量合并的状态
+        saved = buffettIndicator._merged_state
+        assert incremental == full_rebuild(monkeypatch, reset, snapshot)
+        monkeypatch.setattr(buffettIndicator, "_merged_state", saved)
+    assert len(incremental) == len(sources['stock'])
+    assert all(value is not None for row in incremental for value in row.values())
+
+
+def test_revised_history_triggers_full_rebuild(monkeypatch, buffett_state):
+    reset, rebuilds = buffett_state
+    sources = make_sources(1500)
+    load(monkeypatch, sources)
+    revised = {name: frame.copy() for name, frame in sources.items()}
+    revised['cpi'].loc[len(revised['cpi']) - 3, '今值'] += 0.5
+    result = load(monkeypatch, revised)
+    assert len(rebuilds) == 2
+    assert result == full_rebuild(monkeypatch, reset, revised)
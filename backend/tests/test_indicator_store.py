@@ -0,0 +1,83 @@
+import copy
+import datetime
+import random
+import pytest
+from config.DiskCache import DiskCache
+from config.IndicatorStore import IndicatorStore
+from indicators import macroIndicators
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    macroIndicators.load_indicators()
+    store = IndicatorStore(disk=DiskCache(str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(macroIndicators, "indicator_store", store)
+    return store
+
+
+def daily_rows(start, count, rng):
+    base = datetime.date(2000, 1, 3)
+    return [{"日期": (base + datetime.timedelta(days=i)).isoformat() + "T00:00:00.000", "今值": rng.random(),
+             "预测值": None if i % 3 else 1.0, "前值": rng.random()} for i in range(start, start + count)]
+
+
+def monthly_rows(start, count, rng):
+    return [{"月份": f"{2000 + i // 12}年{i % 12 + 1:02d}月份", "当月": rng.random(), "同比增长": 1}
+            for i in range(start, start + count)]
+
+
+def lpr_rows(start, count, rng):
+    # 同一天有多条记录，按 last 聚合
+    return [{"TRADE_DATE": f"{2000 + i // 336}-{1 + i // 28 % 12:02d}-{1 + i % 28 // 2 * 2:02d}T00:00:00.000",
+             "LPR1Y": 4.0 + rng.random(), "LPR5Y": None if i % 5 == 0 else 4.8} for i in range(start, start + count)]
+
+
+CASES = [
+    ("macro_china_cpi_yearly", daily_rows),
+    ("macro_china_ppi", monthly_rows),
+    ("macro_china_lpr", lpr_rows),
+]
+
+
+def process(store, name, data):
+    """处理数据并返回 (结果, 处理方式)，同时检查结果与全量重新处理一致"""
+    before = store.stats()
+    payload = macroIndicators.get_processed_indicator(name, data)
+    after = store.stats()
+    events = [event for event in ("unchanged", "incremental", "rebuilt") if after[event] != before[event]]
+    assert payload == macroIndicators.process_indicator_data(macroIndicators.INDICATORS[name], copy.deepcopy(data))
+    return events
+
+
+@pytest.mark.parametrize("name, generate", CASES)
+def test_incremental_processing_matches_full_rebuild(store, name, generate):
+    rng = random.Random(3)
+    y_field = macroIndicators.INDICATORS[name]["yFields"][0]
+    data = generate(0, 1500, rng)
+    assert process(store, name, data) == ["rebuilt"]
+    assert process(store, name, copy.deepcopy(data)) == ["unchanged"]
+
+    # 追加新记录
+    data = data + generate(1500, 6, rng)
+    assert process(store, name, data) == ["incremental"]
+    # 修改最新的记录
+    data = copy.deepcopy(data)
+    data[-1][y_field] = 123.0
+    assert process(store, name, data) == ["incremental"]
+    # 去掉最新的记录
+    data = data[:-1]
+    assert process(store, name, data) == ["incremental"]
+    # 修改历史记录时重新处理全部数据
+    data = copy.deepcopy(data)
+    data[100][y_field] = -1.0
+    assert process(store, name, data) == ["rebuilt"]
+
+
+@pytest.mark.parametrize("name, generate", CASES)
+def test_incremental_processing_after_restoring_from_disk(store, name, generate):
+    rng = random.Random(5)
+    data = generate(0, 800, rng)
+    process(store, name, data)
+    # 模拟后端重启：内存中的记录丢失，只能从磁盘恢复
+    store._records.clear()
+    assert process(store, name, data + generate(800, 4, rng)) == ["incremental"]
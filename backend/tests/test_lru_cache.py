@@ -0,0 +1,87 @@
+import time
+import pandas as pd
+from config.LRUCache import LRUCache, ShardedLRUCache
+
+PUBLIC_METHODS = ["set", "set_entry", "get", "get_stale", "delete", "clear",
+                  "clean_expired", "size_in_bytes", "stats", "start_sweeper"]
+
+
+def keys_in_shard(cache, shard, count):
+    """生成 count 个落在同一分段中的键"""
+    keys, i = [], 0
+    while len(keys) < count:
+        key = f"key-{i}"
+        if cache._shard(key) is cache._shards[shard]:
+            keys.append(key)
+        i += 1
+    return keys
+
+
+def test_sharded_cache_has_same_interface():
+    for name in PUBLIC_METHODS:
+        assert callable(getattr(ShardedLRUCache, name)), name
+    stats = ShardedLRUCache(shards=4, max_size=64).stats()
+    assert set(LRUCache(max_size=64).stats()) <= set(stats)
+    assert stats["shards"] == 4
+
+
+def test_sharded_cache_behaves_like_lru_cache():
+    for cache in (LRUCache(max_size=64), ShardedLRUCache(shards=4, max_size=64)):
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=-1, stale_ttl=3600)  # 已过期，仍在宽限期内
+        cache.set_entry("c", 3, time.time() - 10, time.time() - 5)  # 已超过宽限期
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get_stale("b") == (2, True)
+        assert cache.get_stale("missing") == (None, False)
+        assert cache.clean_expired() == 1
+        cache.delete("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert cache.size_in_bytes() == 0
+
+
+def test_sharded_stats_are_summed_over_shards():
+    cache = ShardedLRUCache(shards=4, max_size=64)
+    for i in range(20):
+        cache.set(f"key-{i}", i)
+    for i in range(30):
+        cache.get(f"key-{i}")
+    stats = cache.stats()
+    assert stats["entries"] == 20
+    assert stats["hits"] == 20
+    assert stats["misses"] == 10
+    assert stats["max_size"] == 64
+    assert stats["hits"] == sum(shard.stats()["hits"] for shard in cache._shards)
+
+
+def test_sharded_eviction_is_per_shard():
+    cache = ShardedLRUCache(shards=4, max_size=16)  # 每个分段最多 4 项
+    crowded = keys_in_shard(cache, 0, 6)
+    others = keys_in_shard(cache, 1, 3)
+    for key in others + crowded:
+        cache.set(key, key)
+    # 只有拥挤分段中最早写入的两项被淘汰，其它分段不受影响
+    assert [cache.get(key) for key in crowded] == [None, None] + crowded[2:]
+    assert [cache.get(key) for key in others] == others
+    assert cache.stats()["evictions"] == 2
+
+
+def test_sharded_byte_limit_is_per_shard():
+    frame = pd.DataFrame({"value": range(1000)})
+    size = int(frame.memory_usage(index=True, deep=True).sum())
+    cache = ShardedLRUCache(shards=2, max_size=64, max_bytes=size * 4)  # 每个分段最多 2 份
+    crowded = keys_in_shard(cache, 0, 3)
+    for key in crowded:
+        cache.set(key, frame)
+    assert cache.get(crowded[0]) is None
+    assert cache.get(crowded[2]) is frame
+    assert cache.size_in_bytes() <= size * 2
+
+
+def test_oversized_value_replaces_existing_entry():
+    for cache in (LRUCache(max_size=8, max_bytes=10000), ShardedLRUCache(shards=2, max_size=8, max_bytes=20000)):
+        cache.set("key", "old", ttl=3600)
+        cache.set("key", "x" * 50000, ttl=3600)
+        assert cache.get("key") is None
+        assert cache.size_in_bytes() == 0
@@ -0,0 +1,28 @@
+from datetime import datetime
+from config.ttlPolicy import SHANGHAI_TZ, intraday, next_trading_day
+
+
+def at(text):
+    return datetime.fromisoformat(text).replace(tzinfo=SHANGHAI_TZ)
+
+
+def test_next_trading_day_expires_at_close_when_fetched_in_session():
+    # 2024-07-05 为周五
+    assert next_trading_day(at("2024-07-05 10:00:00")) == 5 * 3600
+
+
+def test_next_trading_day_expires_after_settle_window():
+    assert next_trading_day(at("2024-07-05 15:10:00")) == 20 * 60
+
+
+def test_next_trading_day_after_settle_lasts_until_next_open():
+    assert next_trading_day(at("2024-07-05 15:30:00")) == (2 * 24 + 18) * 3600
+    assert next_trading_day(at("2024-07-04 08:00:00")) == 1.5 * 3600
+
+
+def test_intraday_keeps_short_ttl_in_settle_window():
+    policy = intraday(60)
+    assert policy(at("2024-07-05 15:00:10")) == 60
+    assert policy(at("2024-07-05 15:29:40")) == 20
+    assert policy(at("2024-07-05 15:30:00")) == (2 * 24 + 18) * 3600
+    assert policy(at("2024-07-06 15:10:00")) == (24 + 18) * 3600 + 20 * 60